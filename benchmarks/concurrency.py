@@ -0,0 +1,173 @@
+"""Read throughput of SQLite under a parallel write load, with SQLite's
+stock settings ("before") and with the pragmas of blog.sqlite ("after").
+
+    python -m benchmarks.concurrency [--readers 4] [--writers 2]
+                                     [--duration 10] [--scale 0.0002]
+
+Reader processes request profile and post pages, writer processes post
+comments and messages, all through the test client for --duration
+seconds. Reads and writes per second, read latency percentiles and the
+requests failed with "database is locked" are printed for both modes.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import OperationalError, connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from posts.models import Message, Post  # noqa: E402
+
+User = get_user_model()
+
+# SQLite defaults; busy_timeout is the 5 s of Python's sqlite3.connect().
+BEFORE = {
+    'SQLITE_PRAGMAS': {'journal_mode': 'DELETE', 'synchronous': 'FULL',
+                       'busy_timeout': 5000, 'mmap_size': 0,
+                       'cache_size': -2000, 'temp_store': 'DEFAULT'},
+    'SQLITE_IMMEDIATE_TRANSACTIONS': False,
+}
+
+
+MESSAGE = 'Сообщение под нагрузкой'
+
+
+def targets(rng, count):
+    """Return page URLs to read and (author, post) pairs to comment."""
+    posts = list(Post.objects.order_by('?').values_list(
+        'id', 'author__username')[:count])
+    pages = [reverse('post', args=[author, post]) for post, author in posts]
+    pages += [reverse('profile', args=[author]) for _, author in posts]
+    rng.shuffle(pages)
+    return pages, posts
+
+
+def read(client, rng, pages, posts, users):
+    return client.get(rng.choice(pages))
+
+
+def write(client, rng, pages, posts, users):
+    if rng.random() < 0.5:
+        post, author = rng.choice(posts)
+        return client.post(reverse('add_comment', args=[author, post]),
+                           {'text': 'Комментарий под нагрузкой'})
+    return client.post(reverse('send_message', args=[rng.choice(users)]),
+                       {'message': MESSAGE})
+
+
+def check_messages(since):
+    """Exit if the writers stored no messages or messages without text."""
+    written = Message.objects.filter(pk__gt=since)
+    if not written.exists() or written.exclude(text=MESSAGE).exists():
+        sys.exit('Writers did not store the messages they sent')
+
+
+def work(action, client, seed, start, duration, data, results):
+    """Repeat an action until the time is up and report the latencies."""
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    while time.time() < start:
+        time.sleep(0.001)
+    while time.time() < start + duration:
+        began = time.perf_counter()
+        try:
+            action(client, rng, *data)
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - began) * 1000)
+    results.put((action.__name__, latencies, errors))
+
+
+def run(options, clients, data):
+    connections.close_all()
+    # Leaving WAL needs the only connection to the file.
+    with connection.cursor():
+        pass
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    start = time.time() + 1
+    workers = [
+        context.Process(target=work, args=(
+            action, client, number, start, options.duration, data, results))
+        for number, (action, client) in enumerate(clients)]
+    for worker in workers:
+        worker.start()
+    totals = {'read': ([], 0), 'write': ([], 0)}
+    for _ in workers:
+        name, latencies, errors = results.get()
+        done, failed = totals[name]
+        totals[name] = (done + latencies, failed + errors)
+    for worker in workers:
+        worker.join()
+    return totals
+
+
+def report(mode, totals, duration):
+    reads, read_errors = totals['read']
+    writes, write_errors = totals['write']
+    reads.sort()
+    pick = lambda percent: reads[min(  # noqa: E731
+        len(reads) - 1, round(percent / 100 * (len(reads) - 1)))]
+    print(f'{mode:6}  reads {len(reads) / duration:7.1f}/s'
+          f'  p50 {pick(50) if reads else 0:7.2f}'
+          f'  p99 {pick(99) if reads else 0:7.2f} ms'
+          f'  mean {statistics.mean(reads) if reads else 0:7.2f} ms'
+          f'  writes {len(writes) / duration:6.1f}/s'
+          f'  locked {read_errors} reads, {write_errors} writes')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--scale', type=float, default=0.0002)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+    rng = random.Random(options.seed)
+
+    call_command('migrate', verbosity=0)
+    if not Post.objects.exists():
+        call_command('seed', users=max(int(100000 * options.scale), 10),
+                     posts=max(int(5000000 * options.scale), 10),
+                     comments=max(int(2000000 * options.scale), 10),
+                     follows=max(int(1000000 * options.scale), 10),
+                     messages=max(int(10000000 * options.scale), 10),
+                     workers=1, seed=options.seed, verbosity=0)
+    pages, posts = targets(rng, 200)
+    users = list(User.objects.values_list('username', flat=True)[:200])
+    accounts = User.objects.order_by('?')[:options.readers + options.writers]
+    clients = []
+    for number, user in enumerate(accounts):
+        client = Client()
+        client.force_login(user)
+        clients.append((read if number < options.readers else write, client))
+
+    for mode, overrides in (('before', BEFORE), ('after', {})):
+        since = Message.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        with override_settings(**overrides):
+            totals = run(options, clients, (pages, posts, users))
+        report(mode, totals, options.duration)
+        check_messages(since)
+
+
+if __name__ == '__main__':
+    main()
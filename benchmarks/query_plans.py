@@ -0,0 +1,128 @@
+"""Query plans and timings of the hot lookups before and after the
+0015_hot_path_indexes migration.
+
+    python -m benchmarks.query_plans [--posts 50000]
+
+The scratch database is migrated to 0014, seeded, measured, migrated to
+the latest state and measured again. Seeding and the "before" queries use
+the historical models of 0014, as later migrations add columns.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.apps import apps as current_apps  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.migrations.executor import MigrationExecutor  # noqa: E402
+
+BEFORE = '0014_search'
+
+
+def historical_apps(migration):
+    """App registry of the models as of a migration of posts."""
+    loader = MigrationExecutor(connection).loader
+    return loader.project_state(('posts', migration)).apps
+
+
+def seed(apps, posts):
+    rng = random.Random(1)
+    User = apps.get_model('auth', 'User')
+    Comment, Follow, Group, Message, Post = (
+        apps.get_model('posts', name)
+        for name in ('Comment', 'Follow', 'Group', 'Message', 'Post'))
+    User.objects.bulk_create(
+        User(username=f'user{i}') for i in range(max(posts // 100, 10)))
+    Group.objects.bulk_create(
+        Group(title=f'g{i}', slug=f'g{i}', description='') for i in range(20))
+    # SQLite does not return primary keys from bulk inserts.
+    users = list(User.objects.order_by('id'))
+    groups = list(Group.objects.order_by('id'))
+    # bulk_create skips post_save, so search and timelines stay empty.
+    Post.objects.bulk_create(
+        (Post(text='text', author=rng.choice(users),
+              group=rng.choice(groups + [None]))
+         for _ in range(posts)), batch_size=500)
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (Comment(post_id=rng.choice(post_ids), author=rng.choice(users),
+                 text='ok') for _ in range(posts)), batch_size=500)
+    Message.objects.bulk_create(
+        (Message(user_to=rng.choice(users[:5]), user_from=rng.choice(users),
+                 text='hi') for _ in range(posts)), batch_size=500)
+    Follow.objects.bulk_create(
+        Follow(user=user, author=author)
+        for user in users[:50] for author in rng.sample(users, 5)
+        if user != author)
+    return users[0].pk, users[1].pk, groups[0].pk, post_ids[len(post_ids) // 2]
+
+
+def hot_queries(apps, user, other, group, post_id):
+    Comment, Follow, Message, Post = (
+        apps.get_model('posts', name)
+        for name in ('Comment', 'Follow', 'Message', 'Post'))
+    return {
+        'index': Post.objects.all()[:10],
+        'profile': Post.objects.filter(author=user)[:10],
+        'group': Post.objects.filter(group=group)[:10],
+        'comments': Comment.objects.filter(
+            post_id=post_id).order_by('created'),
+        'conversation': Message.objects.filter(
+            user_to=user, user_from=other).order_by('created'),
+        'is_follow': Follow.objects.filter(user=user, author=other),
+    }
+
+
+def measure(queries, repeat=20):
+    results = {}
+    for name, queryset in queries.items():
+        plan = queryset.explain()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=50000)
+    options = parser.parse_args()
+
+    call_command('migrate', 'posts', BEFORE, verbosity=0)
+    call_command('migrate', verbosity=0)
+    call_command('migrate', 'posts', BEFORE, verbosity=0)
+    apps = historical_apps(BEFORE)
+    fixtures = seed(apps, options.posts)
+    analyze()
+    before = measure(hot_queries(apps, *fixtures))
+    call_command('migrate', verbosity=0)
+    analyze()
+    after = measure(hot_queries(current_apps, *fixtures))
+
+    for name in before:
+        print(f'== {name}')
+        for label, (plan, median) in (('before', before[name]),
+                                      ('after', after[name])):
+            print(f'  {label}: {median:.2f} ms')
+            for line in plan.splitlines():
+                print(f'    {line}')
+
+
+if __name__ == '__main__':
+    main()
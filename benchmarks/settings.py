@@ -0,0 +1,17 @@
+"""Settings of the benchmark scripts: the project settings on a scratch
+database given by BENCH_DB and a scratch media directory, so benchmarks
+never touch db.sqlite3 or media/."""
+import os
+import tempfile
+
+from blog.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'blog.sqlite',
+        'NAME': os.environ.get('BENCH_DB') or os.path.join(
+            tempfile.mkdtemp(prefix='blog-bench-'), 'bench.sqlite3'),
+    }
+}
+MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'blog-bench-media')
+DEBUG = False
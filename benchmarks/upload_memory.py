@@ -0,0 +1,108 @@
+"""Peak memory of one image upload through new_post, with Django's default
+upload handlers and limits off ("before") and with ImageUploadHandler
+("after"). The renditions rendered in the background are included, since
+they decode every accepted image.
+
+    python -m benchmarks.upload_memory [--side 3000]
+
+Every upload runs in a fresh process so that its peak resident set size
+(VmHWM, Linux only) is not shadowed by an earlier one. The photo must stay
+under IMAGE_UPLOAD_MAX_BYTES for the "after" run to measure the re-encode
+of an accepted upload rather than a rejection.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from posts import thumbnails  # noqa: E402
+
+User = get_user_model()
+
+BEFORE = {
+    'FILE_UPLOAD_HANDLERS': [
+        'django.core.files.uploadhandler.MemoryFileUploadHandler',
+        'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+    ],
+    'IMAGE_UPLOAD_MAX_BYTES': 2 ** 40,
+    'IMAGE_UPLOAD_MAX_PIXELS': 2 ** 40,
+    'IMAGE_MAX_SIDE': 2 ** 20,
+}
+
+
+def make_images(directory, side):
+    """Write a noisy photo and a highly compressible pixel bomb."""
+    photo = os.path.join(directory, 'photo.jpg')
+    Image.effect_noise((side, side * 2 // 3), 64).convert('RGB').save(
+        photo, quality=95)
+    bomb = os.path.join(directory, 'bomb.png')
+    Image.new('1', (12000, 12000)).save(bomb, optimize=True)
+    return {'photo': photo, 'bomb': bomb}
+
+
+def peak_kb():
+    # ru_maxrss would survive the exec of the child from the parent.
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+
+
+def upload(path, mode):
+    """Post one image in this process and print the peak memory."""
+    client = Client()
+    client.force_login(User.objects.get(username='bench'))
+    overrides = BEFORE if mode == 'before' else {}
+    start = peak_kb()
+    with override_settings(**overrides), open(path, 'rb') as image:
+        response = client.post('/new/', {'text': 'Пост', 'image': image})
+        thumbnails.executor().shutdown(wait=True)
+    # new_post redirects once the post is saved and re-renders the form
+    # with the error of a rejected image.
+    print(response.status_code == 302, start, peak_kb())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--side', type=int, default=3000)
+    parser.add_argument('--upload', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+    if options.upload:
+        return upload(options.upload, options.mode)
+
+    call_command('migrate', verbosity=0)
+    User.objects.get_or_create(username='bench')
+    env = dict(os.environ, BENCH_DB=settings.DATABASES['default']['NAME'])
+    with tempfile.TemporaryDirectory() as directory:
+        images = make_images(directory, options.side)
+        for name, path in images.items():
+            size = os.path.getsize(path) / 2 ** 20
+            print(f'== {name}: {size:.1f} MB')
+            for mode in ('before', 'after'):
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.upload_memory',
+                     '--upload', path, '--mode', mode],
+                    env=env, check=True, capture_output=True, text=True)
+                accepted, start, peak = output.stdout.split()[-3:]
+                growth = (int(peak) - int(start)) / 1024
+                result = 'accepted' if accepted == 'True' else 'rejected'
+                print(f'  {mode}: {result}, peak +{growth:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Latency, queries and memory of the main views on a large dataset.
+
+    python -m benchmarks.views [--scale 0.001] [--requests 50]
+                               [--output run.json] [--compare base.json]
+
+At --scale 1 the scratch database is seeded by `manage.py seed` with 100k
+users, 5M posts, 2M comments, 1M follows and 10M messages. Every view is
+requested through the test client, first for latency percentiles and
+queries per request, then once more under tracemalloc for the peak of
+Python memory. Query counts come from the Server-Timing header of
+blog.metrics. Results are printed and, with --output, written as JSON.
+--compare reads an earlier run and exits with status 1 if a view got slower
+than --tolerance allows or runs more queries. Set BENCH_DB to keep the
+seeded database between runs, --reuse skips seeding when it is already
+filled.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from posts.seeding import WORDS  # noqa: E402
+from posts.models import Comment, Follow, Group, Message, Post  # noqa: E402
+
+User = get_user_model()
+
+FULL_SCALE = {
+    'users': 100000,
+    'posts': 5000000,
+    'comments': 2000000,
+    'follows': 1000000,
+    'messages': 10000000,
+}
+
+
+def counts(scale):
+    return {name: max(int(count * scale), 10)
+            for name, count in FULL_SCALE.items()}
+
+
+def seed(scale, seed):
+    call_command('seed', **counts(scale), seed=seed,
+                 stdout=sys.stdout)
+
+
+def scenarios(rng):
+    """Return (name, authenticated, url) of every benchmarked request."""
+    viewer = User.objects.get(username='user0')
+    other = Message.objects.filter(user_to=viewer).values_list(
+        'user_from__username', flat=True).first() or viewer.username
+    author = Post.objects.order_by('-id').values_list(
+        'author__username', flat=True).first()
+    post = Post.objects.order_by('-id').values_list('id', flat=True).first()
+    group = Group.objects.order_by('id').first()
+    return viewer, [
+        ('index', True, reverse('index')),
+        ('index_anonymous', False, reverse('index')),
+        ('index_page_50', True, reverse('index') + '?page=50'),
+        ('index_hot', True, reverse('index') + '?sort=hot'),
+        ('group', True, reverse('group', args=[group.slug])),
+        ('profile', True, reverse('profile', args=[author])),
+        ('post', True, reverse('post', args=[author, post])),
+        ('follow_index', True, reverse('follow_index')),
+        ('find_post', True, reverse('find_post') + '?text=' + ' '.join(
+            rng.sample(WORDS, 2))),
+        ('message', True, reverse('message', args=[other])),
+        ('inbox', True, reverse('inbox')),
+        ('api_index_100', True, reverse('api_index') + '?limit=100'),
+        ('api_follow_100', True,
+         reverse('api_follow_index') + '?limit=100'),
+        ('api_comments', True, reverse('api_comments', args=[post])),
+    ]
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda percent: values[min(  # noqa: E731
+        len(values) - 1, round(percent / 100 * (len(values) - 1)))]
+    return {'p50': pick(50), 'p90': pick(90), 'p99': pick(99),
+            'mean': statistics.mean(values)}
+
+
+def queries(response):
+    """Read the query counts reported by blog.metrics."""
+    timing = response['Server-Timing']
+    return (int(re.search(r'"(\d+) queries"', timing).group(1)),
+            int(re.search(r'"(\d+) duplicate queries"', timing).group(1)))
+
+
+def measure(client, url, requests):
+    client.get(url)
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+    count, duplicates = queries(response)
+    tracemalloc.start()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'latency_ms': {name: round(value, 2)
+                       for name, value in percentiles(timings).items()},
+        'queries': count,
+        'duplicate_queries': duplicates,
+        'peak_memory_kb': peak // 1024,
+    }
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, base, tolerance):
+    """Print the change of every view, return False on a regression."""
+    ok = True
+    for name, result in results.items():
+        before = base['results'].get(name)
+        if before is None:
+            continue
+        old, new = before['latency_ms']['p50'], result['latency_ms']['p50']
+        change = (new - old) / old if old else 0
+        slower = change > tolerance
+        more_queries = result['queries'] > before['queries']
+        ok = ok and not slower and not more_queries
+        print(f'{name:16} p50 {old:8.2f} -> {new:8.2f} ms ({change:+.0%})'
+              f'  queries {before["queries"]} -> {result["queries"]}'
+              f'{"  REGRESSION" if slower or more_queries else ""}')
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--scale', type=float, default=0.001)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--reuse', action='store_true')
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    options = parser.parse_args()
+    rng = random.Random(options.seed)
+
+    call_command('migrate', verbosity=0)
+    if not (options.reuse and Post.objects.exists()):
+        start = time.perf_counter()
+        seed(options.scale, options.seed)
+        print(f'Seeded in {time.perf_counter() - start:.1f} s')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    viewer, requests = scenarios(rng)
+    clients = {False: Client(), True: Client()}
+    clients[True].force_login(viewer)
+    results = {}
+    for name, authenticated, url in requests:
+        results[name] = measure(clients[authenticated], url,
+                                options.requests)
+        latency = results[name]['latency_ms']
+        print(f'{name:16} p50 {latency["p50"]:8.2f}  p90 {latency["p90"]:8.2f}'
+              f'  p99 {latency["p99"]:8.2f} ms'
+              f'  {results[name]["queries"]:3} queries'
+              f' ({results[name]["duplicate_queries"]} repeated)'
+              f'  {results[name]["peak_memory_kb"]:6} KB')
+
+    run = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'scale': options.scale,
+            'rows': {'users': User.objects.count(),
+                     'posts': Post.objects.count(),
+                     'comments': Comment.objects.count(),
+                     'follows': Follow.objects.count(),
+                     'messages': Message.objects.count()},
+            'requests': options.requests,
+        },
+        'results': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(run, output, indent=2, ensure_ascii=False)
+    if options.compare:
+        with open(options.compare) as base:
+            if not compare(results, json.load(base), options.tolerance):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
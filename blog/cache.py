@@ -0,0 +1,163 @@
+"""Cache backend shared by all worker processes of one host.
+
+Entries live in a single SQLite file in WAL mode, so every gunicorn worker
+sees the same values and the same invalidations without running a cache
+server. Usage in settings:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'blog.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/blog-cache.sqlite3',
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = ('CREATE TABLE IF NOT EXISTS cache ('
+          'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)')
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    # Expired and surplus rows are culled once per this many writes.
+    cull_every = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        # Connections must not cross a fork or a thread.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def _expiry(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _encode(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _read(self, connection, key):
+        row = connection.execute(
+            'SELECT value, expires FROM cache WHERE key = ?',
+            (key,)).fetchone()
+        if row is None or row[1] is not None and row[1] <= time.time():
+            return None
+        return row
+
+    def _after_write(self, connection):
+        self._writes += 1
+        if self._writes % self.cull_every == 0:
+            self._cull(connection)
+
+    def _cull(self, connection):
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            surplus = count // self._cull_frequency
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)', (surplus,))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._read(self._connection(), key)
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, self._encode(value), self._expiry(timeout)))
+        self._after_write(connection)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with _immediate(connection):
+            if self._read(connection, key) is not None:
+                return False
+            connection.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                (key, self._encode(value), self._expiry(timeout)))
+        self._after_write(connection)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with _immediate(connection):
+            if self._read(connection, key) is None:
+                return False
+            connection.execute(
+                'UPDATE cache SET expires = ? WHERE key = ?',
+                (self._expiry(timeout), key))
+        return True
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._read(self._connection(), key) is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Atomically add `delta`, across threads and processes."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with _immediate(connection):
+            row = self._read(connection, key)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._encode(value), key))
+        return value
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections are reused for the life of the thread.
+        pass
+
+
+class _immediate:
+    """Write transaction taken before the first read (BEGIN IMMEDIATE)."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
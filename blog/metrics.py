@@ -0,0 +1,234 @@
+"""Per-request query and timing metrics.
+
+RequestMetricsMiddleware counts the SQL queries of every request, their
+total time and the statements run more than once, and times the view and
+the template rendering (through the TimedDjangoTemplates backend). The
+results are sent back in a Server-Timing header and logged as one JSON
+line to the `blog.metrics` logger.
+
+Each process keeps the timings of its last requests per URL name and
+merges them into a shared window of REQUEST_METRICS_WINDOW samples in the
+cache every FLUSH_EVERY requests. `summary()` computes the percentiles
+shown on the admin page at /admin/metrics/.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import connections
+from django.shortcuts import render
+from django.template.backends.django import DjangoTemplates, Template
+
+FLUSH_EVERY = 20
+SAMPLES_KEY = 'metrics:requests:%s'
+NAMES_KEY = 'metrics:requests'
+FIELDS = ('total', 'view', 'sql', 'template', 'queries', 'duplicates')
+PERCENTILES = (50, 95, 99)
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_pending = defaultdict(list)
+_lock = threading.Lock()
+
+
+def window() -> int:
+    return getattr(settings, 'REQUEST_METRICS_WINDOW', 1000)
+
+
+def current():
+    """Return the metrics of the request handled by this thread or None."""
+    return getattr(_local, 'metrics', None)
+
+
+class RequestMetrics:
+    """Counters of one request, also used as a database execute wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.view = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self) -> int:
+        """Queries whose SQL, parameters aside, already ran before."""
+        return sum(count - 1 for count in self.statements.values())
+
+    def as_dict(self, total) -> dict:
+        return {
+            'total': round(total * 1000, 2),
+            'view': round(self.view * 1000, 2),
+            'sql': round(self.sql * 1000, 2),
+            'template': round(self.template * 1000, 2),
+            'queries': self.queries,
+            'duplicates': self.duplicates,
+        }
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that adds render times to the metrics.
+
+    Included templates render inside their parent, so only templates
+    loaded by the views are timed and nothing is counted twice.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(
+            self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        start = time.perf_counter()
+        try:
+            with _wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        total = time.perf_counter() - start
+        if getattr(request, '_metrics_view_start', None) is not None:
+            metrics.view = time.perf_counter() - request._metrics_view_start
+        match = getattr(request, 'resolver_match', None)
+        name = match.url_name if match and match.url_name else 'unknown'
+        record = metrics.as_dict(total)
+        response['Server-Timing'] = server_timing(record)
+        logger.info(json.dumps({
+            'url_name': name, 'method': request.method,
+            'path': request.path, 'status': response.status_code,
+            **record}))
+        _record(name, record)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_start = time.perf_counter()
+
+
+class _wrap_connections:
+    """Install an execute wrapper on every database connection."""
+
+    def __init__(self, wrapper):
+        self.contexts = [connection.execute_wrapper(wrapper)
+                         for connection in connections.all()]
+
+    def __enter__(self):
+        for context in self.contexts:
+            context.__enter__()
+
+    def __exit__(self, *exc_info):
+        for context in reversed(self.contexts):
+            context.__exit__(*exc_info)
+
+
+def server_timing(record) -> str:
+    return ', '.join([
+        'db;dur=%s;desc="%d queries"' % (record['sql'], record['queries']),
+        'dup;desc="%d duplicate queries"' % record['duplicates'],
+        'tpl;dur=%s' % record['template'],
+        'view;dur=%s' % record['view'],
+        'total;dur=%s' % record['total'],
+    ])
+
+
+def _record(name, record):
+    with _lock:
+        pending = _pending[name]
+        pending.append([record[field] for field in FIELDS])
+        if len(pending) < FLUSH_EVERY:
+            return
+        samples = pending[:]
+        pending.clear()
+    _merge(name, samples)
+
+
+def _merge(name, samples):
+    # Concurrent merges may drop a few samples, fine for rolling metrics.
+    key = SAMPLES_KEY % name
+    cache.set(key, (cache.get(key, []) + samples)[-window():], None)
+    names = cache.get(NAMES_KEY, set())
+    if name not in names:
+        cache.set(NAMES_KEY, names | {name}, None)
+
+
+def flush():
+    """Merge the samples of this process into the shared windows."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    for name, samples in pending.items():
+        _merge(name, samples)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summary() -> dict:
+    """Return {url_name: {'count': n, field: {percentile: value}}}."""
+    flush()
+    names = sorted(cache.get(NAMES_KEY, set()))
+    windows = cache.get_many([SAMPLES_KEY % name for name in names])
+    result = {}
+    for name in names:
+        samples = windows.get(SAMPLES_KEY % name)
+        if not samples:
+            continue
+        columns = dict(zip(FIELDS, zip(*samples)))
+        result[name] = {'count': len(samples)}
+        for field in FIELDS:
+            result[name][field] = {
+                percent: percentile(columns[field], percent)
+                for percent in PERCENTILES}
+    return result
+
+
+def report_view(request):
+    """Admin page with the percentiles of every URL name."""
+    rows = [(name, values['count'],
+             [values[field][percent]
+              for field in FIELDS for percent in PERCENTILES])
+            for name, values in summary().items()]
+    return render(request, 'admin/request_metrics.html', {
+        **admin.site.each_context(request),
+        'title': 'Метрики запросов',
+        'rows': rows,
+        'fields': FIELDS,
+        'percentiles': PERCENTILES,
+    })
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.metrics.RequestMetricsMiddleware',
+    'posts.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -47,7 +49,7 @@ TEMPLATES_DIR_FLATPAGES = os.path.join(BASE_DIR, "templates/flatpages")
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blog.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR, TEMPLATES_DIR_DETAIL, TEMPLATES_DIR_FLATPAGES],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,17 +67,46 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
-} 
+}
+# LocMemCache is private to one process. Multi-worker deployments set
+# BLOG_CACHE_PATH to an SQLite file on local disk shared by all workers.
+if os.environ.get('BLOG_CACHE_PATH'):
+    CACHES['default'] = {
+        'BACKEND': 'blog.cache.SQLiteCache',
+        'LOCATION': os.environ['BLOG_CACHE_PATH'],
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
 
 WSGI_APPLICATION = 'blog.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blog.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# Read-only views read from REPLICA_DATABASE when it is configured, which
+# BLOG_REPLICA_DB does with a copy of db.sqlite3 kept by
+# `manage.py sync_replica`. Browsers that wrote read from `default` for
+# REPLICA_STICKY_SECONDS (see posts.replicas).
+if os.environ.get('BLOG_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'blog.sqlite',
+        'NAME': os.environ['BLOG_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+
+# Pragmas run on every SQLite connection over the blog.sqlite defaults
+# (WAL, synchronous=NORMAL, mmap, cache size and a 20 s busy timeout),
+# None keeps the SQLite default. Atomic blocks take the write lock at once
+# with SQLITE_IMMEDIATE_TRANSACTIONS.
+SQLITE_PRAGMAS = {}
+SQLITE_IMMEDIATE_TRANSACTIONS = True
+REPLICA_DATABASE = 'replica'
+REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -110,4 +141,74 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') 
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
-]
\ No newline at end of file
+]
+
+# URL names of listing views that paginate with opaque `after`/`before`
+# cursors instead of `?page=N` (no COUNT(*), no OFFSET).
+CURSOR_PAGINATION_VIEWS = []
+# Comments shown under a post at once, more load through a cursor.
+COMMENTS_PER_PAGE = 20
+# Rows per page of the JSON API (posts.api) and the most `?limit=` allows.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+# Most usernames one request to /api/follow/ or /api/unfollow/ may list.
+BULK_FOLLOW_LIMIT = 100
+
+# Follow suggestions kept per user by `manage.py suggest_follows`, and the
+# follows of one user walked while scoring them (see posts.suggestions).
+FOLLOW_SUGGESTIONS = 10
+SUGGESTION_MAX_NEIGHBOURS = 200
+
+# Trending posts and groups (see posts.trending): activity is counted in
+# buckets of TRENDING_BUCKET_MINUTES, `manage.py compact_trending` ranks
+# the last TRENDING_WINDOW_HOURS with a TRENDING_HALF_LIFE_HOURS decay and
+# keeps the TRENDING_SIZE best of each kind.
+TRENDING_BUCKET_MINUTES = 60
+TRENDING_WINDOW_HOURS = 72
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_SIZE = 200
+
+# Home timelines keep this many newest posts per user. Authors with more
+# followers than TIMELINE_FANOUT_LIMIT are pulled at read time instead of
+# being copied into every follower's timeline.
+TIMELINE_LENGTH = 500
+TIMELINE_FANOUT_LIMIT = 10000
+
+# Number of groups and users listed in the cached sidebars.
+SIDEBAR_SIZE = 20
+
+# Threads rendering thumbnails of uploaded post images in the background.
+THUMBNAIL_WORKERS = 2
+
+# Widths of the JPEG and WebP renditions listed in the srcset of post images.
+IMAGE_RENDITION_WIDTHS = (320, 640, 960)
+
+# Uploads are streamed to disk. Images over IMAGE_UPLOAD_MAX_BYTES or
+# IMAGE_UPLOAD_MAX_PIXELS are rejected before they are decoded, accepted
+# ones are re-encoded down to IMAGE_MAX_SIDE pixels on the longer side.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.ImageUploadHandler']
+IMAGE_UPLOAD_MAX_BYTES = 10 * 2 ** 20
+IMAGE_UPLOAD_MAX_PIXELS = 40000000
+IMAGE_MAX_SIDE = 2560
+
+# Requests per URL name kept for the percentiles of /admin/metrics/.
+# Each request is also logged as JSON by the `blog.metrics` logger, raise
+# BLOG_METRICS_LOG to INFO to see it.
+REQUEST_METRICS_WINDOW = 1000
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blog.metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get('BLOG_METRICS_LOG', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Newest followers and followees listed next to a profile.
+PROFILE_FOLLOW_PREVIEW = 20
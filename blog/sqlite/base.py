@@ -0,0 +1,50 @@
+"""SQLite database backend tuned for concurrent readers and writers.
+
+Every new connection runs the pragmas of SQLITE_PRAGMAS over DEFAULT_PRAGMAS:
+in WAL mode readers go on while a connection writes, synchronous=NORMAL
+syncs at checkpoints only, and busy_timeout makes writers wait for the lock
+instead of failing with "database is locked". A pragma set to None is left
+at the SQLite default. With SQLITE_IMMEDIATE_TRANSACTIONS atomic blocks
+start with BEGIN IMMEDIATE: a transaction that reads before it writes then
+waits for the write lock up front, where upgrading a read lock would fail at
+once without waiting. Usage in settings:
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'blog.sqlite',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        }
+    }
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 2 ** 20,
+    # Negative sizes are in KiB.
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
+
+def pragmas() -> dict:
+    configured = {**DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    return {name: value for name, value in configured.items()
+            if value is not None}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in pragmas().items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if getattr(settings, 'SQLITE_IMMEDIATE_TRANSACTIONS', True):
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
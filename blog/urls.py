@@ -5,12 +5,16 @@ from django.conf.urls import handler404, handler500
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import metrics
+
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa
 urlpatterns = [
     path('about/', include('django.contrib.flatpages.urls')),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
+    path("admin/metrics/", admin.site.admin_view(metrics.report_view),
+         name="request_metrics"),
     path("admin/", admin.site.urls),
     path("about-author/", views.flatpage,
          {'url': '/about-author/'}, name='about'),
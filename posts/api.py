@@ -0,0 +1,224 @@
+"""JSON read API for the mobile clients.
+
+Lists are cursor pages walked with the `after`/`before` tokens of
+posts.pagination, `limit` sets the page size up to API_MAX_PAGE_SIZE.
+Rows are read with `.values()` and mapped to API field names, so no model
+instance is built, and `fields=id,text` returns only the listed fields.
+Responses carry an ETag of their body and conditional GETs get a 304.
+Pages of the index and group feeds are kept in the page cache namespaces
+of these feeds and are dropped by the same signals (see posts.page_cache).
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from . import follows, profile_stats, timeline
+from .models import Group, Post, User
+from .page_cache import INDEX, group_feed
+from .pagination import CursorPaginator
+from .replicas import replica_reads
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'comment_count': 'comment_count',
+    'image': 'thumbnail_url',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+POST_ORDERING = ('-pub_date', '-id')
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def page_size(request) -> int:
+    default = getattr(settings, 'API_PAGE_SIZE', 20)
+    try:
+        size = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError('limit must be a number')
+    return max(1, min(size, getattr(settings, 'API_MAX_PAGE_SIZE', 100)))
+
+
+def fieldset(request, fields: dict) -> dict:
+    """Return {name: ORM path} of the fields asked for by `?fields=`."""
+    names = [name.strip() for name in request.GET.get('fields', '').split(',')
+             if name.strip()]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError('Unknown fields: %s' % ', '.join(unknown))
+    return {name: fields[name] for name in names} if names else dict(fields)
+
+
+def rows_page(request, queryset, fields: dict, ordering) -> dict:
+    """Return one cursor page of rows with the requested fields."""
+    selected = fieldset(request, fields)
+    # Cursors are built from the ordering key, fetch it even if unwanted.
+    paths = list(dict.fromkeys(
+        [*selected.values(), *(name.lstrip('-') for name in ordering)]))
+    paginator = CursorPaginator(
+        queryset.values(*paths), page_size(request), ordering)
+    page = paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
+    return {
+        'results': [{name: row[path] for name, path in selected.items()}
+                    for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def _query_key(request) -> str:
+    return hashlib.md5(repr(sorted(request.GET.lists())).encode()).hexdigest()
+
+
+def _respond(request, payload, private=False):
+    content = json.dumps(payload, cls=DjangoJSONEncoder,
+                         ensure_ascii=False).encode()
+    etag = quote_etag(hashlib.md5(content).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    if private:
+        patch_cache_control(response, private=True)
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
+
+
+def api_view(private=False, methods=('GET', 'HEAD')):
+    """Serve an endpoint whose view returns the payload to send.
+
+    Only GET responses carry an ETag.
+
+    """
+    def decorator(view_func):
+        @replica_reads
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'error': 'Method not allowed'},
+                                    status=405)
+            if private and not request.user.is_authenticated:
+                return JsonResponse({'error': 'Authentication required'},
+                                    status=401)
+            try:
+                payload = view_func(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse({'error': str(error)},
+                                    status=error.status)
+            except Http404:
+                return JsonResponse({'error': 'Not found'}, status=404)
+            if request.method not in ('GET', 'HEAD'):
+                return JsonResponse(payload)
+            return _respond(request, payload, private)
+        return wrapper
+    return decorator
+
+
+@api_view()
+def index(request):
+    """Posts of all authors, newest first."""
+    return INDEX.get_or_set(
+        'api', _query_key(request),
+        default=lambda: rows_page(request, Post.objects.all(), POST_FIELDS,
+                                  POST_ORDERING))
+
+
+@api_view()
+def group_posts(request, slug):
+    """Posts of a group, newest first."""
+    def load():
+        group = get_object_or_404(Group.objects.only('id'), slug=slug)
+        return rows_page(request, group.posts.all(), POST_FIELDS,
+                         POST_ORDERING)
+    return group_feed(slug).get_or_set(
+        'api', _query_key(request), default=load)
+
+
+@api_view()
+def profile(request, username):
+    """An author with the counters and follow previews of the profile."""
+    author = get_object_or_404(User.objects.only(*USER_FIELDS),
+                               username=username)
+    return {**{name: getattr(author, name) for name in USER_FIELDS},
+            **profile_stats.get(author)}
+
+
+@api_view()
+def profile_posts(request, username):
+    """Posts of an author, newest first."""
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    return rows_page(request, author.posts.all(), POST_FIELDS,
+                     POST_ORDERING)
+
+
+@api_view()
+def post(request, post_id):
+    """One post."""
+    selected = fieldset(request, POST_FIELDS)
+    row = Post.objects.filter(id=post_id).values(*selected.values()).first()
+    if row is None:
+        raise Http404
+    return {name: row[path] for name, path in selected.items()}
+
+
+@api_view()
+def comments(request, post_id):
+    """Comments under a post, oldest first or newest with ?order=newest."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    newest = request.GET.get('order') == 'newest'
+    return rows_page(request, post.comments.all(), COMMENT_FIELDS,
+                     ('-created', '-id') if newest else ('created', 'id'))
+
+
+@api_view(private=True)
+def follow_index(request):
+    """Home timeline of the signed in user."""
+    return rows_page(request, timeline.home_posts(request.user),
+                     POST_FIELDS, POST_ORDERING)
+
+
+def usernames(request) -> list:
+    """Read the {"usernames": [...]} body of a batch request."""
+    try:
+        names = json.loads(request.body)['usernames']
+    except (ValueError, TypeError, KeyError):
+        raise ApiError('Expected {"usernames": [...]}')
+    if not isinstance(names, list) or not all(
+            isinstance(name, str) for name in names):
+        raise ApiError('usernames must be a list of strings')
+    if len(names) > follows.batch_limit():
+        raise ApiError('At most %d usernames at once' % follows.batch_limit())
+    return names
+
+
+@api_view(private=True, methods=('POST',))
+def follow_many(request):
+    """Follow every listed author, e.g. the suggestions of onboarding."""
+    return {'followed': follows.follow(request.user, usernames(request))}
+
+
+@api_view(private=True, methods=('POST',))
+def unfollow_many(request):
+    """Stop following every listed author."""
+    return {'unfollowed': follows.unfollow(request.user, usernames(request))}
@@ -0,0 +1,128 @@
+"""Namespaced caching for feeds, fragments and counters.
+
+Every namespace has a version number stored in the cache itself and all
+of its keys embed that version, so `invalidate()` drops a whole namespace
+with one increment, in every worker process that shares the cache.
+
+Hits and misses are counted per namespace in the process and added to
+shared counters every FLUSH_EVERY lookups; `stats()` reads them back.
+"""
+import threading
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+FLUSH_EVERY = 50
+VERSION_KEY = 'ns:%s:version'
+METRIC_KEY = 'ns:%s:%s'
+METRICS = ('hits', 'misses')
+MISSING = object()
+
+_pending = defaultdict(Counter)
+_lock = threading.Lock()
+_known = set()
+
+
+def _incr(key, delta):
+    if not cache.add(key, delta, None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+
+
+def _record(namespace, metric):
+    with _lock:
+        pending = _pending[namespace]
+        pending[metric] += 1
+        if sum(pending.values()) < FLUSH_EVERY:
+            return
+        flushed = dict(pending)
+        pending.clear()
+    _flush(namespace, flushed)
+
+
+def _flush(namespace, counts):
+    for metric, delta in counts.items():
+        if delta:
+            _incr(METRIC_KEY % (namespace, metric), delta)
+
+
+def flush():
+    """Push the counts of this process to the shared counters."""
+    with _lock:
+        pending = {name: dict(counts) for name, counts in _pending.items()}
+        _pending.clear()
+    for namespace, counts in pending.items():
+        _flush(namespace, counts)
+
+
+def stats(namespaces=None) -> dict:
+    """Return {namespace: {'hits': n, 'misses': n}} across processes."""
+    flush()
+    names = sorted(namespaces or _known)
+    keys = [METRIC_KEY % (name, metric)
+            for name in names for metric in METRICS]
+    values = cache.get_many(keys)
+    return {name: {metric: values.get(METRIC_KEY % (name, metric), 0)
+                   for metric in METRICS}
+            for name in names}
+
+
+class Namespace:
+    """A group of cache keys that are invalidated together.
+
+    Keyword arguments:
+    name    -- Unique name, e.g. 'sidebar:groups' or 'feed:index'
+    timeout -- Default timeout of the values in seconds
+    metrics -- Name hits and misses are counted under, defaults to `name`
+
+    """
+
+    def __init__(self, name: str, timeout: int = 300, metrics: str = None):
+        self.name = name
+        self.timeout = timeout
+        self.metrics = metrics or name
+        _known.add(self.metrics)
+
+    def __repr__(self):
+        return '<Namespace %s>' % self.name
+
+    @property
+    def version(self) -> int:
+        key = VERSION_KEY % self.name
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, 1, None)
+            version = cache.get(key, 1)
+        return version
+
+    def key(self, *parts) -> str:
+        return ':'.join(['ns', self.name, str(self.version),
+                         *map(str, parts)])
+
+    def get(self, *parts, default=None):
+        value = cache.get(self.key(*parts), MISSING)
+        _record(self.metrics, 'misses' if value is MISSING else 'hits')
+        return default if value is MISSING else value
+
+    def set(self, *parts, value, timeout=None):
+        cache.set(self.key(*parts), value,
+                  self.timeout if timeout is None else timeout)
+
+    def get_or_set(self, *parts, default, timeout=None):
+        """Return the cached value or store the result of `default()`."""
+        value = self.get(*parts, default=MISSING)
+        if value is MISSING:
+            value = default()
+            self.set(*parts, value=value, timeout=timeout)
+        return value
+
+    def invalidate(self):
+        key = VERSION_KEY % self.name
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Unknown version: start above the default so stale keys
+            # written against version 1 by other processes are skipped.
+            cache.set(key, 2, None)
@@ -0,0 +1,97 @@
+"""Denormalized counters for users and posts.
+
+The Post, Follow and Comment receivers of posts.signals run these helpers
+for every saved or deleted row; only the signal-free bulk paths of
+posts.follows call them directly. A missing UserStats row is not an
+error: it is computed from the source tables on first read, so only
+existing rows are bumped.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Correlated COUNT(*) subquery over `queryset` grouped by `field`."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by().values(field)
+        .annotate(total=Count('pk')).values('total')), Value(0))
+
+
+def user_counts():
+    """Expressions computing UserStats fields for an outer User row."""
+    return {
+        'followers_count': _count(Follow.objects.all(), 'author'),
+        'following_count': _count(Follow.objects.all(), 'user'),
+        'posts_count': _count(Post.objects.all(), 'author'),
+    }
+
+
+def get_stats(user) -> UserStats:
+    """Return counters of the user, computing them if they are missing."""
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        pass
+    counts = User.objects.filter(pk=user.pk).values(**user_counts()).get()
+    stats, _ = UserStats.objects.get_or_create(user=user, defaults=counts)
+    return stats
+
+
+def _bump(user, **deltas):
+    _bump_all([user], **deltas)
+
+
+def _bump_all(users, **deltas):
+    # Clamp at zero: rows written without signals (bulk inserts, raw SQL)
+    # may have left the counter behind; repair_counters puts it right.
+    UserStats.objects.filter(user__in=users).update(**{
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items()})
+
+
+def post_created(post):
+    _bump(post.author_id, posts_count=1)
+
+
+def post_deleted(post):
+    _bump(post.author_id, posts_count=-1)
+
+
+def comment_added(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1)
+
+
+def comment_deleted(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, Value(0)))
+
+
+def followed(user, author, count=1):
+    """Account `count` new follows of `user` on `author`."""
+    _bump(user, following_count=count)
+    _bump(author, followers_count=count)
+
+
+def unfollowed(user, author, count=1):
+    _bump(user, following_count=-count)
+    _bump(author, followers_count=-count)
+
+
+def followed_many(user, author_ids):
+    """Account new follows of `user` on every author, one follow each."""
+    _bump(user, following_count=len(author_ids))
+    _bump_all(author_ids, followers_count=1)
+
+
+def unfollowed_many(user, author_ids):
+    _bump(user, following_count=-len(author_ids))
+    _bump_all(author_ids, followers_count=-1)
+
+
+def comment_counts():
+    """Expression computing Post.comment_count for an outer Post row."""
+    return _count(Comment.objects.all(), 'post')
@@ -0,0 +1,74 @@
+"""Following and unfollowing many authors at once.
+
+The usernames of a batch are resolved by one query and the follows are
+inserted by bulk_create(ignore_conflicts=True) against the follow_obj
+unique constraint, or deleted by one DELETE. Neither sends model signals,
+so counters, home timelines, trending scores and cached profile statistics
+are updated here once per batch, in the same transaction.
+"""
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from . import counters, profile_stats, timeline, trending
+from .models import Follow, User
+
+BATCH_SIZE = 500
+
+
+def batch_limit() -> int:
+    return getattr(settings, 'BULK_FOLLOW_LIMIT', 100)
+
+
+def resolve(user, usernames) -> dict:
+    """Map the ids of existing authors among `usernames` to their names."""
+    return dict(User.objects.filter(username__in=set(usernames))
+                .exclude(pk=user.pk).values_list('id', 'username'))
+
+
+def follow(user, usernames) -> list:
+    """Follow the given authors, return the names of new followees."""
+    with transaction.atomic():
+        # The transaction holds the write lock from its start (see
+        # blog.sqlite), so the follows read here stay current.
+        authors = resolve(user, usernames)
+        followed = set(Follow.objects.filter(
+            user=user, author__in=authors).values_list('author', flat=True))
+        new = [author for author in authors if author not in followed]
+        if not new:
+            return []
+        Follow.objects.bulk_create(
+            (Follow(user=user, author_id=author) for author in new),
+            batch_size=BATCH_SIZE, ignore_conflicts=True)
+        counters.followed_many(user, new)
+        timeline.backfill_many(user, new)
+        trending.followed(new)
+        profile_stats.invalidate(user.pk, *new)
+    return sorted(authors[author] for author in new)
+
+
+def _delete(user, author_ids) -> int:
+    """Delete the follows with one statement, return the rows deleted."""
+    # QuerySet.delete() would send a signal and purge a timeline per row.
+    connection = connections[router.db_for_write(Follow)]
+    table = connection.ops.quote_name(Follow._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} '
+            f'WHERE user_id = %s AND author_id IN ({placeholders})',
+            [user.pk, *author_ids])
+        return cursor.rowcount
+
+
+def unfollow(user, usernames) -> list:
+    """Stop following the given authors, return the names unfollowed."""
+    with transaction.atomic():
+        authors = resolve(user, usernames)
+        gone = list(Follow.objects.filter(
+            user=user, author__in=authors).values_list('author', flat=True))
+        if not gone or not _delete(user, gone):
+            return []
+        counters.unfollowed_many(user, gone)
+        timeline.purge_many(user, gone)
+        profile_stats.invalidate(user.pk, *gone)
+    return sorted(authors[author] for author in gone)
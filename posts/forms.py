@@ -1,9 +1,12 @@
 from attr import fields
 from django import forms
 from .models import Post, Group, Comment, Message, models
+from django.core.files.uploadedfile import UploadedFile
 from django.core.validators import ValidationError
 from django.forms import Textarea
 
+from .uploads import RejectedUpload, cap_size
+
 
 class PostForm(forms.ModelForm):
     class Meta:
@@ -21,6 +24,24 @@ class PostForm(forms.ModelForm):
             "image": "Картинка к посту",
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Files rejected while streaming are reported instead of validated.
+        self.upload_error = None
+        image = self.files.get('image')
+        if isinstance(image, RejectedUpload):
+            self.files = self.files.copy()
+            del self.files['image']
+            self.upload_error = image.error
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if self.upload_error:
+            raise ValidationError(self.upload_error)
+        if isinstance(image, UploadedFile):
+            image = cap_size(image)
+        return image
+
     def clean_group(self):
         group = self.cleaned_data['group']
 
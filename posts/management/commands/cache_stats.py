@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import caching
+
+
+class Command(BaseCommand):
+    help = 'Show cache hits and misses per namespace.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('namespaces', nargs='*')
+
+    def handle(self, *args, **options):
+        for name, counts in caching.stats(options['namespaces']).items():
+            total = counts['hits'] + counts['misses']
+            ratio = counts['hits'] / total if total else 0
+            self.stdout.write(
+                f"{name}: {counts['hits']} hits, {counts['misses']} misses "
+                f"({ratio:.0%} hit rate)")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Fold recent activity counters into the trending rankings and '
+            'drop counters older than the window. Run every few minutes.')
+
+    def handle(self, *args, **options):
+        sizes = trending.compact()
+        self.stdout.write(self.style.SUCCESS(
+            f"Ranked {sizes['post']} posts and {sizes['group']} groups."))
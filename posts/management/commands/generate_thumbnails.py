@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Render missing renditions of post images in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=thumbnails.workers(),
+            help='Thumbnails rendered at the same time.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Render renditions that already exist again.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            posts = posts.filter(srcset_jpeg='')
+        ids = list(posts.order_by('id').values_list('id', flat=True))
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for post_id, ok in zip(ids, pool.map(thumbnails.run, ids)):
+                if ok:
+                    done += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f'Post {post_id} failed.')
+                if (done + failed) % 100 == 0:
+                    self.stdout.write(f'Rendered {done} of {len(ids)}.')
+        self.stdout.write(f'Rendered {done} thumbnails, {failed} failed.')
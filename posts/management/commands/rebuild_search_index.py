@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post, SearchTerm
+from posts.search import document_terms
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the post search index in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Posts reindexed per transaction.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id, total = 0, 0
+        while True:
+            chunk = list(Post.objects.filter(id__gt=last_id).order_by('id')
+                         .values_list('id', 'text')[:chunk_size])
+            if not chunk:
+                break
+            ids = [post_id for post_id, _ in chunk]
+            with transaction.atomic():
+                SearchTerm.objects.filter(post__in=ids).delete()
+                SearchTerm.objects.bulk_create(
+                    (SearchTerm(term=term, post_id=post_id, weight=weight)
+                     for post_id, text in chunk
+                     for term, weight in document_terms(text).items()),
+                    # SQLite allows 500 rows per INSERT.
+                    batch_size=500)
+            last_id, total = ids[-1], total + len(ids)
+            self.stdout.write(f'Indexed {total} posts.')
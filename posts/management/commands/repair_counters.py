@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from posts import counters
+from posts.models import Post, User, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized user and post counters and fix drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows updated per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        missing = User.objects.filter(stats__isnull=True).values_list(
+            'pk', flat=True)
+        created = UserStats.objects.bulk_create(
+            (UserStats(user_id=pk) for pk in missing.iterator()),
+            batch_size=min(batch_size, 500), ignore_conflicts=True)
+        self.stdout.write(f'Created {len(created)} missing user counters.')
+
+        user_counts = counters.user_counts()
+        drifted = User.objects.annotate(**{
+            f'real_{field}': expression
+            for field, expression in user_counts.items()
+        }).filter(stats__isnull=False).exclude(
+            Q(stats__followers_count=F('real_followers_count'))
+            & Q(stats__following_count=F('real_following_count'))
+            & Q(stats__posts_count=F('real_posts_count')))
+        fixed = self.repair(
+            drifted, UserStats.objects.all(), 'user__in', user_counts,
+            batch_size)
+        self.stdout.write(f'Repaired {fixed} user counters.')
+
+        comment_count = counters.comment_counts()
+        drifted = Post.objects.annotate(
+            real_comment_count=comment_count).exclude(
+            comment_count=F('real_comment_count'))
+        fixed = self.repair(
+            drifted, Post.objects.all(), 'pk__in',
+            {'comment_count': comment_count}, batch_size)
+        self.stdout.write(f'Repaired {fixed} post counters.')
+
+    @staticmethod
+    def repair(drifted, target, lookup, expressions, batch_size):
+        """Recompute `expressions` on `target` for drifted pks in batches."""
+        pks = list(drifted.values_list('pk', flat=True))
+        # The expressions correlate on the outer row's pk, which for
+        # UserStats is the user id as well.
+        for start in range(0, len(pks), batch_size):
+            with transaction.atomic():
+                target.filter(**{lookup: pks[start:start + batch_size]}) \
+                    .update(**expressions)
+        return len(pks)
@@ -0,0 +1,137 @@
+import io
+import multiprocessing
+import os
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+
+from posts import messaging, seeding, timeline, trending
+from posts.models import Follow, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with synthetic users, groups, posts, '
+            'comments, follows and messages.')
+
+    def add_arguments(self, parser):
+        for kind, default in (('users', 1000), ('posts', 10000),
+                              ('comments', 10000), ('follows', 5000),
+                              ('messages', 10000)):
+            parser.add_argument(
+                f'--{kind}', type=int, default=default,
+                help=f'Number of {kind} to create.')
+        parser.add_argument(
+            '--groups', type=int, default=20,
+            help='Number of groups to create.')
+        parser.add_argument(
+            '--posts-alpha', type=float, default=1.1,
+            help='Power law exponent of posts per author.')
+        parser.add_argument(
+            '--followers-alpha', type=float, default=1.3,
+            help='Power law exponent of followers and messages per user.')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Dates are spread over this many past days.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Rows built per task of a worker.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes building and inserting chunks.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--prefix', default='user',
+            help='Prefix of the generated usernames.')
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Do not rebuild counters, the search index, conversations, '
+                 'timelines and trending rankings.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Users named {prefix}* exist already, pass another --prefix.')
+        plan = seeding.Plan(options['seed'], prefix, options['chunk_size'],
+                            options['days'])
+        self.started = time.monotonic()
+
+        self.run(plan, 'users', options['users'], options['workers'])
+        plan.set_users(
+            User.objects.filter(username__startswith=prefix)
+            .values_list('id', flat=True),
+            options['posts_alpha'], options['followers_alpha'])
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {prefix} {i}', slug=f'{prefix}-{i}',
+                   description='')
+             for i in range(options['groups'])),
+            batch_size=seeding.BATCH_SIZE)
+        plan.group_ids = list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('id', flat=True))
+        plan.group_ids.append(None)
+
+        last_post = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        self.run(plan, 'posts', options['posts'], options['workers'])
+        # Posts of one run get consecutive ids.
+        first, last = Post.objects.filter(id__gt=last_post).aggregate(
+            Min('id'), Max('id')).values()
+        if first is not None:
+            plan.post_range = (first, last)
+            self.run(plan, 'comments', options['comments'],
+                     options['workers'])
+        for kind in ('follows', 'messages'):
+            self.run(plan, kind, options[kind], options['workers'])
+
+        if not options['skip_derived']:
+            self.rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            f'Done in {time.monotonic() - self.started:.0f} s.'))
+
+    def rebuild_derived(self):
+        """Fill the tables bulk inserts bypass: they skip model signals."""
+        self.stdout.write('Rebuilding counters and the search index.')
+        call_command('repair_counters', stdout=io.StringIO())
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.stdout.write(
+            f'Conversations: {messaging.rebuild_conversations()}.')
+        # After the counters, which decide the authors left out.
+        followers = Follow.objects.order_by().values_list(
+            'user', flat=True).distinct()
+        self.stdout.write(
+            f'Timeline entries: {timeline.rebuild(followers)}.')
+        self.stdout.write(f'Trending counters: {trending.rebuild()}.')
+        trending.compact()
+
+    def run(self, plan, kind, count, workers):
+        """Insert `count` rows of a kind, reporting progress as it goes."""
+        if not count or kind != 'users' and not plan.user_ids:
+            return
+        tasks = plan.chunks(kind, count)
+        if workers > 1:
+            # Connections must not be shared with the forked workers.
+            connections.close_all()
+            pool = multiprocessing.Pool(
+                workers, seeding.init_worker, (plan,))
+            results = pool.imap_unordered(seeding.insert_chunk, tasks)
+        else:
+            pool = None
+            results = (seeding.insert_chunk(task, plan) for task in tasks)
+        done, reported = 0, time.monotonic()
+        try:
+            for _, inserted in results:
+                done += inserted
+                if time.monotonic() - reported >= 1:
+                    reported = time.monotonic()
+                    self.progress(kind, done, count)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        self.progress(kind, done, count)
+
+    def progress(self, kind, done, count):
+        self.stdout.write(f'{kind}: {done}/{count} '
+                          f'[{time.monotonic() - self.started:.0f} s]')
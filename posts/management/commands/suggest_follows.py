@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recompute the "who to follow" suggestions of all users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=None,
+            help='Suggestions kept per user, FOLLOW_SUGGESTIONS by default.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = suggestions.compute(options['top'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {total} suggestions '
+            f'in {time.monotonic() - started:.1f} s.'))
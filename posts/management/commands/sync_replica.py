@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts import replicas
+
+
+class Command(BaseCommand):
+    help = ('Copy the default SQLite database into the replica database, '
+            'standing in for replication on a local setup.')
+
+    def handle(self, *args, **options):
+        alias = replicas.replica_alias()
+        if alias is None:
+            raise CommandError(
+                'No replica database, set BLOG_REPLICA_DB to its file.')
+        source = connections[DEFAULT_DB_ALIAS]
+        target = connections[alias]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError('Only SQLite databases can be copied.')
+        target.close()
+        source.ensure_connection()
+        # The backup API copies a consistent snapshot while others write.
+        copy = sqlite3.connect(target.settings_dict['NAME'])
+        try:
+            source.connection.backup(copy)
+        finally:
+            copy.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied {source.settings_dict["NAME"]} '
+            f'to {target.settings_dict["NAME"]}.'))
@@ -0,0 +1,117 @@
+"""Private conversations between two users."""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+
+from .models import Conversation, Message
+from .pagination import CursorPaginator
+
+PAGE_SIZE = 20
+INBOX_SIZE = 50
+
+
+def conversation(user, other):
+    """All messages between two users, with both users loaded."""
+    return Message.objects.filter(
+        Q(user_from=user, user_to=other) | Q(user_from=other, user_to=user)
+    ).select_related('user_from', 'user_to')
+
+
+def conversation_page(user, other, older: str = None):
+    """Newest PAGE_SIZE messages before the `older` cursor, newest first.
+
+    `page.next_cursor` loads the messages before this page.
+
+    """
+    paginator = CursorPaginator(conversation(user, other), PAGE_SIZE,
+                                ordering=('-created', '-id'))
+    return paginator.get_page(after=older)
+
+
+def _touch(user, partner, message, unread):
+    values = {'last_message': message, 'updated': message.created}
+    rows = Conversation.objects.filter(user=user, partner=partner)
+    if rows.update(unread_count=F('unread_count') + unread, **values):
+        return
+    try:
+        with transaction.atomic():
+            Conversation.objects.create(
+                user=user, partner=partner, unread_count=unread, **values)
+    except IntegrityError:
+        # Created by a concurrent message in the meantime.
+        rows.update(unread_count=F('unread_count') + unread, **values)
+
+
+def send(sender, recipient, text):
+    """Store a message and update both sides of the conversation."""
+    with transaction.atomic():
+        message = Message.objects.create(
+            user_from=sender, user_to=recipient, text=text)
+        _touch(sender, recipient, message, unread=0)
+        if recipient != sender:
+            _touch(recipient, sender, message, unread=1)
+    return message
+
+
+def inbox(user):
+    """Most recent conversations of the user, one indexed query."""
+    return (Conversation.objects.filter(user=user)
+            .select_related('partner', 'last_message')
+            .order_by('-updated')[:INBOX_SIZE])
+
+
+def mark_read(user, sender, conversations=()):
+    """Mark messages from `sender` to `user` as read.
+
+    The unread count is taken from `conversations`, e.g. the loaded inbox,
+    and reset there, or else read from the database. Nothing is written,
+    and no write lock taken, when nothing is unread.
+
+    """
+    conversation = next((item for item in conversations
+                         if item.partner_id == sender.pk), None)
+    if conversation is not None:
+        unread = conversation.unread_count
+    else:
+        unread = Conversation.objects.filter(
+            user=user, partner=sender
+        ).values_list('unread_count', flat=True).first()
+    if not unread:
+        return
+    with transaction.atomic():
+        Message.objects.filter(
+            user_to=user, user_from=sender, is_read=False
+        ).update(is_read=True)
+        Conversation.objects.filter(
+            user=user, partner=sender, unread_count__gt=0
+        ).update(unread_count=0)
+    if conversation is not None:
+        conversation.unread_count = 0
+
+
+def rebuild_conversations() -> int:
+    """Recompute every Conversation from the messages, return the count.
+
+    For messages inserted without send(), e.g. by `manage.py seed`.
+
+    """
+    message = connection.ops.quote_name(Message._meta.db_table)
+    table = connection.ops.quote_name(Conversation._meta.db_table)
+    with transaction.atomic():
+        Conversation.objects.all().delete()
+        with connection.cursor() as cursor:
+            # Both sides of every pair; the recipient's counts unread ones.
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, partner_id, last_message_id, '
+                f'updated, unread_count) '
+                f'SELECT user_id, partner_id, id, created, unread FROM ('
+                f'SELECT id, created, user_id, partner_id, ROW_NUMBER() OVER ('
+                f'PARTITION BY user_id, partner_id ORDER BY created DESC, '
+                f'id DESC) AS position, SUM(unread) OVER ('
+                f'PARTITION BY user_id, partner_id) AS unread FROM ('
+                f'SELECT id, created, user_from_id AS user_id, '
+                f'user_to_id AS partner_id, 0 AS unread FROM {message} '
+                f'UNION ALL SELECT id, created, user_to_id, user_from_id, '
+                f'CASE WHEN is_read THEN 0 ELSE 1 END FROM {message} '
+                f'WHERE user_to_id <> user_from_id) AS sides) AS ranked '
+                f'WHERE position = 1')
+            return cursor.rowcount
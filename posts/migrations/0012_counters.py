@@ -0,0 +1,41 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_comment_count(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    counts = (Comment.objects.filter(post=models.OuterRef('pk'))
+              .order_by().values('post')
+              .annotate(total=models.Count('pk')).values('total'))
+    Post.objects.filter(comments__isnull=False).update(
+        comment_count=models.Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0011_message_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.PositiveIntegerField(default=0)),
+                ('following_count', models.PositiveIntegerField(default=0)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:04
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The posts.search tokenizer as of this migration, copied so that later
+# changes to the app module neither change nor break the backfill.
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+# BM25 parameters; posts are short, so the average length is a constant.
+K1 = 1.2
+B = 0.75
+AVERAGE_LENGTH = 40
+
+STOP_WORDS = frozenset("""
+    и в во не что он на я с со как а то все она так его но да ты к у же вы
+    за бы по только ее мне было вот от меня еще нет о из ему теперь когда
+    даже ну ли если уже или ни быть был него до вас нибудь опять уж вам
+    ведь там потом себя ничего ей может они тут где есть надо ней для мы
+    тебя их чем была сам чтоб без будто чего раз тоже себе под будет ж
+    тогда кто этот того потому этого какой совсем ним здесь этом один
+    the a an and or of to in on at for is are was were be been it this that
+    with as by from not but have has had do does did so if then than
+""".split())
+
+RU_SUFFIXES = sorted(set("""
+    иями ями ами ией иях ях ах ов ев ей ий ый ой ая яя ое ее ые ие ого
+    его ему ому ыми ими ом ем ам ям ую юю ть ться тся ешь ет ете ют ут
+    ит им ите ят ать ять ить ила ило или ал ял ил ы и а я о е у ю ь
+""".split()), key=len, reverse=True)
+EN_SUFFIXES = ('ingly', 'edly', 'ing', 'ies', 'ied', 'ed', 'es', 'ly', 's')
+
+
+def stem(word: str) -> str:
+    """Strip one inflection suffix, keeping a stem of three letters."""
+    suffixes = EN_SUFFIXES if word.isascii() else RU_SUFFIXES
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """Return stemmed search terms of the text, in order."""
+    words = TOKEN_RE.findall((text or '').lower().replace('ё', 'е'))
+    return [stem(word)[:MAX_TERM_LENGTH] for word in words
+            if len(word) > 1 and word not in STOP_WORDS]
+
+
+def document_terms(text: str) -> dict:
+    """Map each term of a post text to its BM25 term weight."""
+    terms = tokenize(text)
+    norm = K1 * (1 - B + B * len(terms) / AVERAGE_LENGTH)
+    return {term: tf * (K1 + 1) / (tf + norm)
+            for term, tf in Counter(terms).items()}
+
+
+def fill_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for post_id, text in Post.objects.values_list('id', 'text').iterator():
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post_id=post_id, weight=weight)
+            for term, weight in document_terms(text).items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='search_term'),
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:08
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 500
+
+
+def drop_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    keep = (Follow.objects.values('user', 'author')
+            .annotate(first=models.Min('id')).values('first'))
+    duplicates = Follow.objects.exclude(id__in=keep)
+    pairs = set(duplicates.values_list('user', 'author'))
+    duplicates.delete()
+
+    # Every duplicate was counted once more in UserStats. Timelines hold
+    # one entry per post anyway, so only the counters need recomputing.
+    def count(field):
+        return Coalesce(models.Subquery(
+            Follow.objects.filter(**{field: models.OuterRef('pk')})
+            .order_by().values(field)
+            .annotate(total=models.Count('pk')).values('total')),
+            models.Value(0))
+
+    for field, column, users in (
+            ('following_count', 'user', {user for user, _ in pairs}),
+            ('followers_count', 'author', {author for _, author in pairs})):
+        users = sorted(users)
+        for start in range(0, len(users), BATCH_SIZE):
+            UserStats.objects.filter(
+                user__in=users[start:start + BATCH_SIZE]).update(
+                **{field: count(column)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['user_to', 'user_from', 'created'], name='message_conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date'], name='post_date'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_date'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='follow_obj'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+def fix_direction(apps, schema_editor):
+    # send_message used to store the sender in user_to and the recipient
+    # in user_from. Existing history counts as read.
+    Message = apps.get_model('posts', 'Message')
+    Message.objects.update(user_to=models.F('user_from'),
+                           user_from=models.F('user_to'),
+                           is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='is_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(is_read=False), fields=['user_to'], name='message_unread'),
+        ),
+        migrations.RunPython(fix_direction, fix_direction),
+    ]
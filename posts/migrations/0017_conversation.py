@@ -0,0 +1,54 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_conversations(apps, schema_editor):
+    Message = apps.get_model('posts', 'Message')
+    Conversation = apps.get_model('posts', 'Conversation')
+    summaries = {}
+    for message in Message.objects.order_by('created', 'id').iterator():
+        for user, partner, unread in (
+                (message.user_from_id, message.user_to_id, False),
+                (message.user_to_id, message.user_from_id,
+                 not message.is_read)):
+            summary = summaries.setdefault(
+                (user, partner),
+                Conversation(user_id=user, partner_id=partner))
+            summary.last_message_id = message.id
+            summary.updated = message.created
+            summary.unread_count += unread
+    Conversation.objects.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_message_read'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated', models.DateTimeField()),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Message')),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user', '-updated'], name='conversation_recent'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('user', 'partner'), name='conversation_pair'),
+        ),
+        migrations.RunPython(fill_conversations, migrations.RunPython.noop),
+    ]
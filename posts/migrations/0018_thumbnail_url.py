@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_conversation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
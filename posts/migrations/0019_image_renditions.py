@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_thumbnail_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='srcset_jpeg',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='srcset_webp',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'post'), ('group', 'group')], max_length=5)),
+                ('object_id', models.PositiveIntegerField()),
+                ('bucket', models.DateTimeField()),
+                ('weight', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group')),
+                ('rank', models.PositiveIntegerField(unique=True)),
+                ('score', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post')),
+                ('rank', models.PositiveIntegerField(unique=True)),
+                ('score', models.FloatField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingcounter',
+            index=models.Index(fields=['bucket'], name='trending_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingcounter',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'bucket'), name='trending_counter'),
+        ),
+    ]
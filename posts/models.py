@@ -14,6 +14,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Load author and group with the posts."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField("date published", auto_now_add=True)
@@ -24,9 +30,23 @@ class Post(models.Model):
         Group, on_delete=models.SET_NULL, blank=True,
         null=True, related_name="posts")
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    thumbnail_url = models.CharField(max_length=255, blank=True,
+                                     editable=False)
+    srcset_jpeg = models.TextField(blank=True, editable=False)
+    srcset_webp = models.TextField(blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_date'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_date'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_date'),
+        ]
 
 
 class Comment(models.Model):
@@ -40,6 +60,12 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField("date comment", auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created'),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -48,10 +74,12 @@ class Follow(models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name="following")
-    constraints = [
-        models.UniqueConstraint(
-            fields=['user', 'author', ], name='follow_obj'),
-    ]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author', ], name='follow_obj'),
+        ]
 
 
 class Message(models.Model):
@@ -63,3 +91,147 @@ class Message(models.Model):
     user_from = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name="messages_from")
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_to', 'user_from', 'created'],
+                         name='message_conversation'),
+            models.Index(fields=['user_to'], name='message_unread',
+                         condition=models.Q(is_read=False)),
+        ]
+
+
+class UserStats(models.Model):
+    """Denormalized user counters, maintained by posts.counters."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE,
+        primary_key=True, related_name='stats')
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+
+
+class TimelineEntry(models.Model):
+    """A post pushed into a follower's home timeline, see posts.timeline."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='timeline')
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date'],
+                         name='timeline_user_date'),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Inverted index of post texts, maintained by posts.search."""
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='search_terms')
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'], name='search_term'),
+        ]
+
+
+class Conversation(models.Model):
+    """Summary of a user's conversation with one partner.
+
+    Each pair of users has two rows, one per side, maintained by
+    posts.messaging when a message is sent or read.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='conversations')
+    partner = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+')
+    last_message = models.ForeignKey(
+        Message, on_delete=models.SET_NULL,
+        null=True, related_name='+')
+    updated = models.DateTimeField()
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'partner'], name='conversation_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-updated'],
+                         name='conversation_recent'),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """One of the top suggested authors for a user, see posts.suggestions."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='suggestions')
+    suggested = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'rank'], name='suggestion_rank'),
+        ]
+
+
+class TrendingCounter(models.Model):
+    """Weighted activity of a post or group in one time bucket.
+
+    Added to by posts.trending on writes and folded into TrendingPost and
+    TrendingGroup by `manage.py compact_trending`.
+    """
+    KINDS = (('post', 'post'), ('group', 'group'))
+
+    kind = models.CharField(max_length=5, choices=KINDS)
+    object_id = models.PositiveIntegerField()
+    bucket = models.DateTimeField()
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id', 'bucket'],
+                name='trending_counter'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='trending_bucket'),
+        ]
+
+
+class TrendingPost(models.Model):
+    """Stored rank of a trending post, see posts.trending."""
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE,
+        primary_key=True, related_name='trending')
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+
+
+class TrendingGroup(models.Model):
+    """Stored rank of a trending group, see posts.trending."""
+    group = models.OneToOneField(
+        Group, on_delete=models.CASCADE,
+        primary_key=True, related_name='trending')
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
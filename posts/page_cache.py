@@ -0,0 +1,91 @@
+"""Full-response cache of feed pages for anonymous readers.
+
+Rendered pages of `index` and `group_posts` are stored per view, group
+slug and query string in a namespace of their feed, together with an ETag
+and a Last-Modified date. Conditional requests are answered with 304
+straight from the cache. Post, comment and group signals invalidate
+exactly the feeds the changed post appears in (see posts.signals).
+"""
+import functools
+import hashlib
+
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .caching import Namespace
+from .replicas import primary
+from .sidebar import NAMESPACES as SIDEBAR_NAMESPACES
+
+INDEX = Namespace('feed:index', timeout=600)
+
+
+def group_feed(slug: str) -> Namespace:
+    return Namespace('feed:group:%s' % slug, timeout=600,
+                     metrics='feed:group')
+
+
+def invalidate(group_slugs=()):
+    """Drop cached pages of the front page and of the given groups."""
+    INDEX.invalidate()
+    for slug in set(group_slugs):
+        if slug:
+            group_feed(slug).invalidate()
+
+
+def _cache_parts(request, view_name):
+    # Pages also carry the sidebars, so their versions are part of the key.
+    sidebars = [namespace.version for namespace in SIDEBAR_NAMESPACES.values()]
+    query = sorted(request.GET.lists())
+    return (view_name, *sidebars, hashlib.md5(
+        repr(query).encode()).hexdigest())
+
+
+def _respond(request, entry):
+    response = get_conditional_response(
+        request, etag=entry['etag'],
+        last_modified=entry['last_modified'])
+    if response is None:
+        response = HttpResponse(
+            entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
+
+
+def cache_anonymous_feed(view_name: str):
+    """Serve anonymous GETs of a feed view from the page cache."""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+            slug = kwargs.get('slug')
+            namespace = group_feed(slug) if slug else INDEX
+            parts = _cache_parts(request, view_name)
+            entry = namespace.get(*parts)
+            if entry is not None:
+                return _respond(request, entry)
+            with primary():
+                response = view_func(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(
+                    hashlib.md5(response.content).hexdigest()),
+                'last_modified': int(timezone.now().timestamp()),
+            }
+            namespace.set(*parts, value=entry)
+            conditional = _respond(request, entry)
+            if conditional.status_code == 304:
+                return conditional
+            response['ETag'] = entry['etag']
+            response['Last-Modified'] = http_date(entry['last_modified'])
+            patch_cache_control(response, max_age=0, must_revalidate=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,156 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """One page of a CursorPaginator.
+
+    Mirrors the parts of django.core.paginator.Page used by the templates,
+    but has no page numbers and no total count.
+
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<CursorPage of %s items>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset paginator over a queryset.
+
+    Pages are addressed by opaque tokens built from the ordering key of the
+    first or last row, so every page is a single indexed range query with
+    no COUNT(*) and no OFFSET.
+
+    Keyword arguments:
+    object_list -- QuerySet to split on pages
+    per_page    -- Number of rows on one page
+    ordering    -- Unique ordering key, e.g. ('-pub_date', '-id')
+
+    """
+    is_cursor = True
+
+    def __init__(self, object_list: QuerySet, per_page: int,
+                 ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-'))
+                for name in self.ordering]
+
+    def encode_cursor(self, obj) -> str:
+        # Rows of a .values() queryset are dicts.
+        values = [obj[name] if isinstance(obj, dict) else getattr(obj, name)
+                  for name, _ in self._fields()]
+        # isoformat() keeps microseconds, which DjangoJSONEncoder drops.
+        values = [value.isoformat() if isinstance(value, datetime.datetime)
+                  else value for value in values]
+        raw = json.dumps(values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token: str) -> list:
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError, binascii.Error):
+            raise InvalidCursor(token)
+        fields = self._fields()
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise InvalidCursor(token)
+        model = self.object_list.model
+        decoded = []
+        for (name, _), value in zip(fields, values):
+            try:
+                value = model._meta.get_field(name).to_python(value)
+            except FieldDoesNotExist:
+                pass
+            except ValidationError:
+                raise InvalidCursor(token)
+            decoded.append(value)
+        return decoded
+
+    def _seek(self, values, forward: bool) -> Q:
+        """Build `key < cursor` (or `>`) for a composite ordering key."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{'%s__%s' % (name, lookup): value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page(self, after: str = None, before: str = None) -> CursorPage:
+        """Return the page following `after` or preceding `before`.
+
+        Broken or stale tokens fall back to the first page.
+
+        """
+        try:
+            if before:
+                values = self.decode_cursor(before)
+                reverse = [name[1:] if name.startswith('-') else '-' + name
+                           for name in self.ordering]
+                rows = list(self.object_list
+                            .filter(self._seek(values, forward=False))
+                            .order_by(*reverse)[:self.per_page + 1])
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                return CursorPage(rows, self, True, has_previous)
+            if after:
+                values = self.decode_cursor(after)
+                queryset = self.object_list.filter(
+                    self._seek(values, forward=True))
+            else:
+                queryset = self.object_list
+        except InvalidCursor:
+            after, queryset = None, self.object_list
+        rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], self, has_next, bool(after))
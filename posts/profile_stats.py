@@ -0,0 +1,81 @@
+"""Author statistics shown next to profiles, posts and chats.
+
+`get()` returns the follower, following and post counts of an author with
+the usernames of their PROFILE_FOLLOW_PREVIEW newest followers and
+followees, read by a single UNION ALL query and cached per author. Follow
+and post signals call `invalidate()` (see posts.signals).
+"""
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from . import counters
+from .caching import Namespace
+from .models import Follow, User, UserStats
+from .replicas import primary
+
+
+def preview_size() -> int:
+    return getattr(settings, 'PROFILE_FOLLOW_PREVIEW', 20)
+
+
+def namespace(user_id) -> Namespace:
+    return Namespace('profile:%s' % user_id, timeout=600, metrics='profile')
+
+
+def _query(connection):
+    stats = connection.ops.quote_name(UserStats._meta.db_table)
+    follow = connection.ops.quote_name(Follow._meta.db_table)
+    user = connection.ops.quote_name(User._meta.db_table)
+    # Every part has the same columns: kind, username and the counters.
+    names = (f'SELECT * FROM (SELECT %s, u.username, NULL, NULL, NULL '
+             f'FROM {follow} f JOIN {user} u ON u.id = f.{{}}_id '
+             f'WHERE f.{{}}_id = %s ORDER BY f.id DESC LIMIT %s) AS {{}}')
+    return ' UNION ALL '.join([
+        f'SELECT %s, NULL, followers_count, following_count, posts_count '
+        f'FROM {stats} WHERE user_id = %s',
+        names.format('user', 'author', 'followers'),
+        names.format('author', 'user', 'following'),
+    ])
+
+
+def _load(author) -> dict:
+    params = ['counts', author.pk]
+    for kind in ('followers', 'following'):
+        params += [kind, author.pk, preview_size()]
+    connection = connections[router.db_for_read(UserStats)]
+    with connection.cursor() as cursor:
+        cursor.execute(_query(connection), params)
+        rows = cursor.fetchall()
+    result = {'followers': [], 'following': []}
+    for kind, username, *counts in rows:
+        if kind == 'counts':
+            result.update(zip(
+                ('followers_count', 'following_count', 'posts_count'),
+                counts))
+        else:
+            result[kind].append(username)
+    if 'posts_count' not in result:
+        stats = counters.get_stats(author)
+        result.update(followers_count=stats.followers_count,
+                      following_count=stats.following_count,
+                      posts_count=stats.posts_count)
+    return result
+
+
+def get(author) -> dict:
+    """Return the counters and follow previews of an author."""
+    def load():
+        with primary():
+            return _load(author)
+    return namespace(author.pk).get_or_set('stats', default=load)
+
+
+def invalidate(*user_ids):
+    """Drop cached statistics of the given users."""
+    def drop():
+        for user_id in set(user_ids):
+            namespace(user_id).invalidate()
+    # Once now and once more after commit, so a reader between the change
+    # and the commit cannot leave the old counters cached.
+    drop()
+    transaction.on_commit(drop)
@@ -0,0 +1,115 @@
+"""Reads of read-only views from a replica database.
+
+Views decorated with `replica_reads` run their queries on the REPLICA_DATABASE
+alias when it is configured (see BLOG_REPLICA_DB in blog.settings), every
+write goes to `default`. A request that writes anything gets a cookie that
+sends the reads of the same browser to `default` for REPLICA_STICKY_SECONDS,
+so users always see their own posts, comments and follows while the
+replica catches up. Caches that writes invalidate are refilled inside
+`primary()`: an entry read from a replica that is behind would keep the
+old data cached long after the write. Locally the replica is a copy of
+db.sqlite3 refreshed by `manage.py sync_replica`.
+"""
+import contextlib
+import functools
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'db_primary'
+# Sessions and the users they log in always come from `default`, so a new
+# login or account is found at once even if the replica is behind.
+PRIMARY_APPS = {'sessions', 'auth', 'contenttypes'}
+
+_local = threading.local()
+
+
+def replica_alias():
+    """Return the replica alias or None when there is no replica."""
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def sticky_seconds() -> int:
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+@contextlib.contextmanager
+def reading():
+    """Send the reads of this thread to the replica until a write."""
+    previous = getattr(_local, 'replica', False)
+    _local.replica = True
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+@contextlib.contextmanager
+def primary():
+    """Send the reads of this thread to `default`, even in `reading()`."""
+    previous = getattr(_local, 'primary', False)
+    _local.primary = True
+    try:
+        yield
+    finally:
+        _local.primary = previous
+
+
+def replica_reads(view_func):
+    """Run a view on the replica unless its user has written recently."""
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or STICKY_COOKIE in request.COOKIES):
+            return view_func(request, *args, **kwargs)
+        with reading():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (getattr(_local, 'replica', False)
+                and not getattr(_local, 'primary', False)
+                and model._meta.app_label not in PRIMARY_APPS):
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Later reads of the request must see the write.
+        _local.replica = False
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the migrated default database.
+        if db == replica_alias():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Keep browsers that wrote on the default database for a while."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _local.wrote
+        finally:
+            _local.wrote = False
+        if wrote and replica_alias():
+            response.set_cookie(STICKY_COOKIE, '1', max_age=sticky_seconds(),
+                                httponly=True, samesite='Lax')
+        return response
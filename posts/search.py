@@ -0,0 +1,94 @@
+"""Full-text search over post texts.
+
+Posts are split into stemmed Russian/English terms and stored in the
+SearchTerm inverted index with a BM25 term weight. A query is answered
+from the index alone and ranked by the sum of weight * idf of its terms.
+"""
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Post, SearchTerm
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+# BM25 parameters; posts are short, so the average length is a constant.
+K1 = 1.2
+B = 0.75
+AVERAGE_LENGTH = 40
+
+STOP_WORDS = frozenset("""
+    и в во не что он на я с со как а то все она так его но да ты к у же вы
+    за бы по только ее мне было вот от меня еще нет о из ему теперь когда
+    даже ну ли если уже или ни быть был него до вас нибудь опять уж вам
+    ведь там потом себя ничего ей может они тут где есть надо ней для мы
+    тебя их чем была сам чтоб без будто чего раз тоже себе под будет ж
+    тогда кто этот того потому этого какой совсем ним здесь этом один
+    the a an and or of to in on at for is are was were be been it this that
+    with as by from not but have has had do does did so if then than
+""".split())
+
+RU_SUFFIXES = sorted(set("""
+    иями ями ами ией иях ях ах ов ев ей ий ый ой ая яя ое ее ые ие ого
+    его ему ому ыми ими ом ем ам ям ую юю ть ться тся ешь ет ете ют ут
+    ит им ите ят ать ять ить ила ило или ал ял ил ы и а я о е у ю ь
+""".split()), key=len, reverse=True)
+EN_SUFFIXES = ('ingly', 'edly', 'ing', 'ies', 'ied', 'ed', 'es', 'ly', 's')
+
+
+def stem(word: str) -> str:
+    """Strip one inflection suffix, keeping a stem of three letters."""
+    suffixes = EN_SUFFIXES if word.isascii() else RU_SUFFIXES
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list:
+    """Return stemmed search terms of the text, in order."""
+    words = TOKEN_RE.findall((text or '').lower().replace('ё', 'е'))
+    return [stem(word)[:MAX_TERM_LENGTH] for word in words
+            if len(word) > 1 and word not in STOP_WORDS]
+
+
+def document_terms(text: str) -> dict:
+    """Map each term of a post text to its BM25 term weight."""
+    terms = tokenize(text)
+    norm = K1 * (1 - B + B * len(terms) / AVERAGE_LENGTH)
+    return {term: tf * (K1 + 1) / (tf + norm)
+            for term, tf in Counter(terms).items()}
+
+
+def index_post(post):
+    """Replace index rows of the post."""
+    with transaction.atomic():
+        SearchTerm.objects.filter(post=post).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post=post, weight=weight)
+            for term, weight in document_terms(post.text).items())
+
+
+def search(query: str):
+    """Return posts matching the query, best first, with a `score`."""
+    terms = set(tokenize(query))
+    if not terms:
+        return Post.objects.none()
+    frequencies = dict(
+        SearchTerm.objects.filter(term__in=terms)
+        .order_by().values_list('term').annotate(total=Count('id')))
+    if not frequencies:
+        return Post.objects.none()
+    # The highest id stands in for COUNT(*) of posts in idf.
+    total = Post.objects.order_by('-id').values_list('id', flat=True)[:1]
+    total = max(list(total) or [1])
+    weights = [
+        When(search_terms__term=term, then=F('search_terms__weight')
+             * Value(math.log(1 + (total - df + 0.5) / (df + 0.5))))
+        for term, df in frequencies.items()]
+    return (Post.objects.filter(search_terms__term__in=frequencies)
+            .annotate(score=Sum(Case(*weights, output_field=FloatField())))
+            .order_by('-score', '-id'))
@@ -0,0 +1,202 @@
+"""Synthetic data for load tests, used by `manage.py seed`.
+
+Rows are generated in chunks of a fixed size, each from its own seeded
+random generator, so a chunk can be built and inserted by any worker
+process and memory use does not grow with the number of rows. Posts per
+author, followers per author and messages per recipient follow power laws:
+the author of rank r is picked with a weight of 1 / r ** alpha.
+"""
+import contextlib
+import datetime
+import itertools
+import random
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from .models import Comment, Follow, Message, Post
+
+User = get_user_model()
+
+# SQLite allows 500 rows per INSERT.
+BATCH_SIZE = 500
+WORDS = ('город', 'лето', 'python', 'django', 'кот', 'музыка', 'книга',
+         'море', 'поход', 'код', 'чай', 'дождь', 'фильм', 'друзья', 'утро',
+         'работа', 'выходные', 'новости', 'фото', 'спорт', 'дом', 'осень')
+# Models of each kind of rows and the date field they are spread over.
+KINDS = {
+    'users': (User, None),
+    'posts': (Post, 'pub_date'),
+    'comments': (Comment, 'created'),
+    'follows': (Follow, None),
+    'messages': (Message, 'created'),
+}
+
+_plan = None
+
+
+def power_law(size, alpha):
+    """Cumulative weights of ranks 1..size for random.choices()."""
+    return list(itertools.accumulate(
+        1 / rank ** alpha for rank in range(1, size + 1)))
+
+
+class Plan:
+    """What the workers need to know to build any chunk.
+
+    Keyword arguments:
+    seed        -- Seed of the random generators of all chunks
+    prefix      -- Prefix of the generated usernames
+    chunk_size  -- Rows per chunk
+    days        -- Dates are spread over this many days before now
+    """
+
+    def __init__(self, seed, prefix, chunk_size, days):
+        self.seed = seed
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.end = timezone.now()
+        self.start = self.end - datetime.timedelta(days=days)
+        self.user_ids = []
+        self.group_ids = []
+        self.post_range = (0, -1)
+        self.counts = {}
+
+    def set_users(self, user_ids, posts_alpha, followers_alpha):
+        # Ranks are shuffled, popular users are not the oldest ones.
+        self.user_ids = list(user_ids)
+        random.Random(self.seed).shuffle(self.user_ids)
+        self.posts_weights = power_law(len(self.user_ids), posts_alpha)
+        self.followers_weights = power_law(
+            len(self.user_ids), followers_alpha)
+
+    def chunks(self, kind, count):
+        """Return the (kind, index, size) tasks of `count` rows."""
+        self.counts[kind] = count
+        return [(kind, index, min(self.chunk_size, count - start))
+                for index, start in enumerate(
+                    range(0, count, self.chunk_size))]
+
+
+def _date(rng, plan):
+    return plan.start + (plan.end - plan.start) * rng.random()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize()
+
+
+def _users(rng, plan, index, size):
+    first = index * plan.chunk_size
+    return (User(username=f'{plan.prefix}{number}',
+                 first_name=f'Имя{number}', last_name=f'Фамилия{number}',
+                 password='!')
+            for number in range(first, first + size))
+
+
+def _posts(rng, plan, index, size):
+    authors = rng.choices(plan.user_ids, cum_weights=plan.posts_weights,
+                          k=size)
+    return (Post(author_id=author, group_id=rng.choice(plan.group_ids),
+                 text=_text(rng, rng.randint(5, 40)),
+                 pub_date=_date(rng, plan))
+            for author in authors)
+
+
+def _comments(rng, plan, index, size):
+    low, high = plan.post_range
+    return (Comment(post_id=rng.randint(low, high),
+                    author_id=rng.choice(plan.user_ids),
+                    text=_text(rng, rng.randint(2, 15)),
+                    created=_date(rng, plan))
+            for _ in range(size))
+
+
+def _follows(rng, plan, index, size):
+    # Chunk i takes its followers from every n-th user starting at the
+    # i-th, n being the number of chunks, so pairs of different chunks
+    # never collide; self-follows and repeats within a chunk are redrawn.
+    chunks = -(-plan.counts['follows'] // plan.chunk_size)
+    followers = plan.user_ids[index::chunks]
+    size = min(size, len(followers) * (len(plan.user_ids) - 1))
+    pairs = set()
+    while len(pairs) < size:
+        missing = size - len(pairs)
+        authors = rng.choices(plan.user_ids,
+                              cum_weights=plan.followers_weights, k=missing)
+        pairs.update((user, author) for user, author in zip(
+            rng.choices(followers, k=missing), authors) if user != author)
+    return (Follow(user_id=user, author_id=author)
+            for user, author in sorted(pairs))
+
+
+def _sender(rng, plan, recipient):
+    while True:
+        sender = rng.choice(plan.user_ids)
+        if sender != recipient:
+            return sender
+
+
+def _messages(rng, plan, index, size):
+    if len(plan.user_ids) < 2:
+        return ()
+    recipients = rng.choices(plan.user_ids,
+                             cum_weights=plan.followers_weights, k=size)
+    return (Message(user_from_id=_sender(rng, plan, recipient),
+                    user_to_id=recipient,
+                    text=_text(rng, rng.randint(2, 20)),
+                    created=_date(rng, plan))
+            for recipient in recipients)
+
+
+BUILDERS = {
+    'users': _users,
+    'posts': _posts,
+    'comments': _comments,
+    'follows': _follows,
+    'messages': _messages,
+}
+
+
+@contextlib.contextmanager
+def explicit_dates(model, field_name):
+    """Let bulk_create store the given dates of an auto_now_add field."""
+    if field_name is None:
+        yield
+        return
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def init_worker(plan):
+    """Pool initializer: keep the plan for the chunks of this worker."""
+    global _plan
+    _plan = plan
+
+
+def insert_chunk(task, plan=None):
+    """Build and insert one chunk of rows, return its kind and size."""
+    plan = plan or _plan
+    kind, index, size = task
+    model, date_field = KINDS[kind]
+    rng = random.Random(f'{plan.seed}:{kind}:{index}')
+    objects = list(BUILDERS[kind](rng, plan, index, size))
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        # Workers take turns on the database file. Seeded data can be
+        # seeded again, so commits skip the fsync.
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout = 60000')
+            cursor.execute('PRAGMA synchronous = OFF')
+    with explicit_dates(model, date_field):
+        # One transaction per INSERT: the write lock is held only while
+        # SQL runs and the next batch is built in parallel.
+        for start in range(0, len(objects), BATCH_SIZE):
+            model.objects.bulk_create(
+                objects[start:start + BATCH_SIZE],
+                ignore_conflicts=kind == 'follows')
+    return kind, len(objects)
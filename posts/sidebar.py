@@ -0,0 +1,49 @@
+"""Cached sidebar fragments of the feed pages.
+
+The group and user lists are rendered inside `{% cache %}` blocks keyed
+by a version number kept in the cache. Creating or deleting a group or
+user bumps the version, so the next request renders a fresh fragment.
+The querysets handed to the templates are lazy and never run while the
+fragment is warm; they read `default`, so a replica that is behind cannot
+fill a fresh fragment with old rows. Signed in users also see their
+newest followers, and their follow suggestions replace the newest users
+(see posts.suggestions).
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from . import profile_stats, suggestions
+from .caching import Namespace
+from .models import Group, User
+
+NAMESPACES = {section: Namespace('sidebar:%s' % section)
+              for section in ('groups', 'users')}
+
+
+def sidebar_size() -> int:
+    return getattr(settings, 'SIDEBAR_SIZE', 20)
+
+
+def invalidate(section: str):
+    NAMESPACES[section].invalidate()
+
+
+def context(user=None) -> dict:
+    """Template context for side_groups.html and side_users.html."""
+    size = sidebar_size()
+    signed_in = user is not None and user.is_authenticated
+    return {
+        # Trending groups first, ranked by posts.trending which refreshes
+        # this fragment, then the others by name.
+        'groups': Group.objects.using(DEFAULT_DB_ALIAS).order_by(
+            F('trending__rank').asc(nulls_last=True), 'slug')[:size],
+        'users': User.objects.using(DEFAULT_DB_ALIAS).order_by(
+            '-date_joined')[:size],
+        'suggestions': suggestions.for_user(user) if signed_in else (),
+        # Newest followers, cached with the profile statistics.
+        'followers': (profile_stats.get(user)['followers']
+                      if signed_in else ()),
+        'sidebar': {section: namespace.version
+                    for section, namespace in NAMESPACES.items()},
+    }
@@ -0,0 +1,128 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, page_cache, profile_stats, search, sidebar, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        timeline.push(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        counters.post_created(instance)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.followed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    counters.unfollowed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.comment_deleted(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline(sender, instance, **kwargs):
+    timeline.purge(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_groups_sidebar(sender, **kwargs):
+    sidebar.invalidate('groups')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_users_sidebar(sender, **kwargs):
+    # Users are saved on every login; only new and deleted ones matter.
+    if kwargs.get('created', True):
+        sidebar.invalidate('users')
+
+
+def _group_slug(post):
+    return post.group.slug if post.group_id else None
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    instance._old_group_slug = None
+    if instance.pk:
+        instance._old_group_slug = Post.objects.filter(
+            pk=instance.pk).values_list('group__slug', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    page_cache.invalidate(
+        [_group_slug(instance), getattr(instance, '_old_group_slug', None)])
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_feeds(sender, instance, **kwargs):
+    page_cache.invalidate([_group_slug(instance)])
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_commented_post_feeds(sender, instance, created, **kwargs):
+    # Feed pages show the comment count of every post.
+    if created:
+        page_cache.invalidate([_group_slug(instance.post)])
+
+
+@receiver(pre_save, sender=Group)
+def invalidate_group_feed(sender, instance, **kwargs):
+    old_slug = None
+    if instance.pk:
+        old_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+    page_cache.group_feed(instance.slug).invalidate()
+    if old_slug:
+        page_cache.group_feed(old_slug).invalidate()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_profiles(sender, instance, **kwargs):
+    profile_stats.invalidate(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_author_profile(sender, instance, **kwargs):
+    if kwargs.get('created', True):
+        profile_stats.invalidate(instance.author_id)
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+        cls.group = Group.objects.create(
+            title='TheCats', slug='Cat', description='We like cats')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(25))
+        cls.post = Post.objects.order_by('-id').first()
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, *args, client=None, **params):
+        response = (client or self.authorized_client).get(
+            reverse(name, args=args), params)
+        return response, response.json()
+
+    def test_feed_pages(self):
+        """Test feeds are walked with cursors without gaps."""
+        texts = []
+        cursor = None
+        while True:
+            response, data = self.get('api_group', 'Cat', limit=10,
+                                      **({'after': cursor} if cursor else {}))
+            texts += [row['text'] for row in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(texts, [f'Пост {i}' for i in range(24, -1, -1)])
+        _, data = self.get('api_follow_index', limit=5)
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(data['results'][0]['author'], 'Denis')
+
+    def test_sparse_fields(self):
+        """Test `fields` limits the fields of every row."""
+        _, data = self.get('api_index', fields='id,comment_count', limit=3)
+        self.assertEqual(data['results'][0],
+                         {'id': self.post.id, 'comment_count': 0})
+        response, data = self.get('api_index', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_grow_with_page_size(self):
+        """Test a page costs the same queries whatever its size."""
+        counts = []
+        for limit in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                self.get('api_profile_posts', 'Denis', limit=limit)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_profile_and_comments(self):
+        """Test profile counters and comments of a post."""
+        for text in ('Первый', 'Второй'):
+            self.authorized_client.post(
+                reverse('add_comment', args=['Denis', self.post.id]),
+                {'text': text})
+        _, data = self.get('api_profile', 'Denis')
+        self.assertEqual(data['followers_count'], 1)
+        self.assertEqual(data['followers'], ['StasBasov'])
+        _, data = self.get('api_comments', self.post.id, order='newest')
+        self.assertEqual([row['text'] for row in data['results']],
+                         ['Второй', 'Первый'])
+        _, data = self.get('api_post', self.post.id, fields='comment_count')
+        self.assertEqual(data, {'comment_count': 2})
+        response, _ = self.get('api_post', 0)
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_get(self):
+        """Test a matching If-None-Match gets a 304 until the feed changes."""
+        url = reverse('api_index')
+        etag = self.authorized_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый', author=self.author)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый')
+
+    def test_follow_needs_login(self):
+        """Test the home timeline answers 401 to anonymous clients."""
+        response, _ = self.get('api_follow_index', client=Client())
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from blog.cache import SQLiteCache
+from posts import caching
+
+
+def increment(path, times):
+    backend = SQLiteCache(path, {})
+    for _ in range(times):
+        backend.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        self.backend = SQLiteCache(self.path, {})
+
+    def test_basic_operations(self):
+        """Test get, set, add, delete and expiry."""
+        self.backend.set('key', {'value': 1})
+        self.assertEqual(self.backend.get('key'), {'value': 1})
+        self.assertFalse(self.backend.add('key', 2))
+        self.backend.delete('key')
+        self.assertIsNone(self.backend.get('key'))
+        self.backend.set('short', 1, timeout=-1)
+        self.assertFalse(self.backend.has_key('short'))
+
+    def test_shared_between_processes(self):
+        """Test increments from several processes are not lost."""
+        self.backend.set('counter', 0)
+        workers = [multiprocessing.Process(target=increment,
+                                           args=(self.path, 50))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.backend.get('counter'), 200)
+
+
+class NamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate(self):
+        """Test invalidation drops all keys of the namespace only."""
+        feed = caching.Namespace('test:feed')
+        other = caching.Namespace('test:other')
+        feed.set(1, value='page')
+        other.set(1, value='page')
+        feed.invalidate()
+        self.assertIsNone(feed.get(1))
+        self.assertEqual(other.get(1), 'page')
+
+    def test_metrics(self):
+        """Test hits and misses are counted per namespace."""
+        feed = caching.Namespace('test:metrics')
+        feed.get_or_set(1, default=lambda: 'page')
+        feed.get(1)
+        feed.get(1)
+        self.assertEqual(caching.stats(['test:metrics']),
+                         {'test:metrics': {'hits': 2, 'misses': 1}})
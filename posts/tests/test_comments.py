@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, text=f'Комментарий {i}',
+                author=User.objects.create_user(username=f'reader{i}'))
+            for i in range(7)]
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.url = reverse('post', args=[cls.user.username, cls.post.id])
+        cls.fragment_url = reverse(
+            'post_comments', args=[cls.user.username, cls.post.id])
+
+    def texts(self, page):
+        return [comment.text for comment in page]
+
+    def test_first_page(self):
+        """Test the post page shows the oldest comments first."""
+        response = self.authorized_client.get(self.url)
+        page = response.context['comment_page']
+        self.assertEqual(self.texts(page), [
+            'Комментарий 0', 'Комментарий 1', 'Комментарий 2'])
+        self.assertContains(response, page.next_cursor)
+        response = self.authorized_client.get(self.url + '?order=newest')
+        self.assertEqual(self.texts(response.context['comment_page']), [
+            'Комментарий 6', 'Комментарий 5', 'Комментарий 4'])
+
+    def test_fragment_continues_after_cursor(self):
+        """Test the fragment endpoint returns only the next comments."""
+        page = self.authorized_client.get(self.url).context['comment_page']
+        texts = []
+        while page.has_next():
+            response = self.authorized_client.get(
+                self.fragment_url, {'after': page.next_cursor})
+            self.assertNotContains(response, '<html>')
+            page = response.context['comment_page']
+            texts += self.texts(page)
+        self.assertEqual(texts, [f'Комментарий {i}' for i in range(3, 7)])
+
+    def test_authors_loaded_with_comments(self):
+        """Test the queries of a comment page do not grow with authors."""
+        with CaptureQueriesContext(connection) as three:
+            self.authorized_client.get(self.fragment_url)
+        with override_settings(COMMENTS_PER_PAGE=7):
+            with CaptureQueriesContext(connection) as seven:
+                self.authorized_client.get(self.fragment_url)
+        self.assertTrue(three.captured_queries)
+        self.assertEqual(len(three), len(seven))
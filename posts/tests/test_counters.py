@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def test_views_keep_counters(self):
+        """Test follow, post and comment views update the counters."""
+        counters.get_stats(self.user)
+        counters.get_stats(self.author)
+        self.authorized_client.get(
+            reverse('profile_follow', args=[self.author]))
+        self.authorized_client.post(reverse('new_post'), {'text': 'Пост'})
+        post = Post.objects.get(author=self.user)
+        self.authorized_client.post(
+            reverse('add_comment', args=[self.user, post.id]),
+            {'text': 'Ок'})
+        user_stats = UserStats.objects.get(user=self.user)
+        author_stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(user_stats.following_count, 1)
+        self.assertEqual(user_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 1)
+
+        self.authorized_client.get(
+            reverse('profile_unfollow', args=[self.author]))
+        self.authorized_client.get(
+            reverse('post_delete', args=[self.user, post.id]))
+        user_stats.refresh_from_db()
+        self.assertEqual(user_stats.following_count, 0)
+        self.assertEqual(user_stats.posts_count, 0)
+
+    def test_orm_writes_keep_counters(self):
+        """Test follows and comments written outside the views count."""
+        counters.get_stats(self.user)
+        counters.get_stats(self.author)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Ок')
+        self.assertEqual(UserStats.objects.get(
+            user=self.author).followers_count, 1)
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 1)
+        follow.delete()
+        comment.delete()
+        self.assertEqual(UserStats.objects.get(
+            user=self.user).following_count, 0)
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 0)
+
+    def test_repair_counters(self):
+        """Test the command repairs counters changed without signals."""
+        counters.get_stats(self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='Ок')
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.filter(pk=post.pk).update(comment_count=0)
+        call_command('repair_counters', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1)
+        self.assertTrue(UserStats.objects.filter(user=self.user).exists())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
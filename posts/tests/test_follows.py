@@ -0,0 +1,82 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import counters, profile_stats
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class BulkFollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.authors = [User.objects.create_user(username=f'author{i}')
+                       for i in range(5)]
+        for author in cls.authors:
+            Post.objects.create(text='Пост', author=author)
+        for user in [cls.user, *cls.authors]:
+            counters.get_stats(user)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def post(self, name, usernames, client=None):
+        return (client or self.authorized_client).post(
+            reverse(name), json.dumps({'usernames': usernames}),
+            content_type='application/json')
+
+    def test_follow_batch(self):
+        """Test a batch updates follows, counters and timelines."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        profile_stats.get(self.user)
+        response = self.post('api_follow', [
+            'author0', 'author1', 'author2', 'nobody', 'StasBasov'])
+        self.assertEqual(response.json(), {'followed': ['author1', 'author2']})
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(counters.get_stats(self.user).following_count, 3)
+        self.assertEqual(
+            counters.get_stats(self.authors[1]).followers_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(profile_stats.get(self.user)['following'],
+                         ['author2', 'author1', 'author0'])
+
+    def test_queries_do_not_grow_with_batch(self):
+        """Test a batch costs the same queries whatever its size."""
+        counts = []
+        for names in (['author0'], ['author1', 'author2', 'author3']):
+            with CaptureQueriesContext(connection) as queries:
+                self.post('api_follow', names)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unfollow_batch(self):
+        """Test unfollowing removes follows and timeline entries."""
+        self.post('api_follow', ['author0', 'author1', 'author2'])
+        response = self.post('api_unfollow', ['author0', 'author1', 'x'])
+        self.assertEqual(response.json(),
+                         {'unfollowed': ['author0', 'author1']})
+        self.assertEqual(list(Follow.objects.filter(user=self.user)
+                              .values_list('author__username', flat=True)),
+                         ['author2'])
+        self.assertEqual(counters.get_stats(self.user).following_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 1)
+
+    def test_bad_requests(self):
+        """Test malformed, oversized and anonymous batches are refused."""
+        response = self.authorized_client.post(
+            reverse('api_follow'), 'usernames', content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+        response = self.post('api_follow', ['x'] * 101)
+        self.assertEqual(response.status_code, 400)
+        response = self.post('api_follow', ['author0'], client=Client())
+        self.assertEqual(response.status_code, 401)
+        response = self.authorized_client.get(reverse('api_follow'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import messaging
+from posts.models import Conversation, Message
+
+User = get_user_model()
+
+
+class MessageViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.url = reverse('message', args=[cls.author.username])
+
+    def send(self, sender, recipient, count):
+        Message.objects.bulk_create(
+            Message(user_from=sender, user_to=recipient, text=f'Привет {i}')
+            for i in range(count))
+
+    def test_send_message(self):
+        """Test the sender and the recipient are stored the right way."""
+        self.authorized_client.post(
+            reverse('send_message', args=[self.author.username]),
+            {'message': 'Привет'})
+        message = Message.objects.get()
+        self.assertEqual(message.user_from, self.user)
+        self.assertEqual(message.user_to, self.author)
+        self.assertEqual(Message.objects.filter(
+            user_to=self.author, is_read=False).count(), 1)
+
+    def test_newest_page_in_chat_order(self):
+        """Test the newest messages are shown oldest first."""
+        self.send(self.user, self.author, 15)
+        self.send(self.author, self.user, 15)
+        response = self.authorized_client.get(self.url)
+        messages = response.context['messages']
+        self.assertEqual(len(messages), messaging.PAGE_SIZE)
+        self.assertEqual(messages[-1], Message.objects.latest('id'))
+        older = self.authorized_client.get(
+            self.url, {'after': response.context['page'].next_cursor})
+        self.assertEqual(len(older.context['messages']), 10)
+        self.assertFalse(older.context['page'].has_next())
+
+    def test_query_count_does_not_grow(self):
+        """Test the chat costs the same queries for 2 and 40 messages."""
+        self.send(self.author, self.user, 2)
+        self.authorized_client.get(self.url)
+        with CaptureQueriesContext(connection) as small:
+            self.authorized_client.get(self.url)
+        self.send(self.user, self.author, 19)
+        self.send(self.author, self.user, 19)
+        with CaptureQueriesContext(connection) as large:
+            self.authorized_client.get(self.url)
+        self.assertEqual(len(small), len(large))
+
+    def unread(self):
+        return Message.objects.filter(user_to=self.user, is_read=False)
+
+    def test_opening_chat_marks_read(self):
+        """Test opening a conversation clears its unread messages."""
+        for text in ('Раз', 'Два', 'Три'):
+            messaging.send(self.author, self.user, text)
+        self.assertEqual(self.unread().count(), 3)
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(self.unread().count(), 0)
+        self.assertEqual(
+            [c.unread_count for c in response.context['conversations']], [0])
+
+    def test_read_chat_does_not_write(self):
+        """Test opening a conversation with nothing unread writes nothing."""
+        messaging.send(self.user, self.author, 'Привет')
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(self.url)
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith('UPDATE')])
+
+    def test_inbox(self):
+        """Test the inbox lists conversations by recency with unread counts."""
+        other = User.objects.create_user(username='Olga')
+        messaging.send(self.author, self.user, 'Первое')
+        messaging.send(other, self.user, 'Второе')
+        messaging.send(other, self.user, 'Третье')
+        self.authorized_client.get(reverse('inbox'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(reverse('inbox'))
+        conversations = list(response.context['conversations'])
+        self.assertEqual([c.partner for c in conversations],
+                         [other, self.author])
+        self.assertEqual([c.unread_count for c in conversations], [2, 1])
+        self.assertContains(response, 'Третье')
+        inbox_queries = [query for query in queries.captured_queries
+                         if 'posts_conversation' in query['sql']]
+        self.assertEqual(len(inbox_queries), 1)
+
+        self.authorized_client.get(reverse('message', args=[other.username]))
+        self.assertEqual(Conversation.objects.get(
+            user=self.user, partner=other).unread_count, 0)
+        self.assertEqual(Conversation.objects.get(
+            user=other, partner=self.user).last_message.text, 'Третье')
+
+    def test_rebuild_conversations(self):
+        """Test rebuilt conversations match the ones send() maintains."""
+        other = User.objects.create_user(username='Olga')
+        messaging.send(self.author, self.user, 'Первое')
+        messaging.send(self.user, self.author, 'Второе')
+        messaging.send(other, self.user, 'Третье')
+        messaging.send(self.user, self.user, 'Себе')
+        fields = ('user', 'partner', 'last_message', 'updated',
+                  'unread_count')
+        kept = set(Conversation.objects.values_list(*fields))
+        self.assertEqual(messaging.rebuild_conversations(), len(kept))
+        self.assertEqual(set(Conversation.objects.values_list(*fields)), kept)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from blog import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.admin = User.objects.create_superuser(
+            username='Admin', email='admin@example.com', password='secret')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        metrics.flush()
+        cache.clear()
+
+    def test_server_timing(self):
+        """Test every response reports its queries and timings."""
+        response = self.authorized_client.get(reverse('index'))
+        names = [part.split(';')[0] for part in
+                 response['Server-Timing'].split(', ')]
+        self.assertEqual(names, ['db', 'dup', 'tpl', 'view', 'total'])
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="\d+ queries"')
+
+    def test_duplicates(self):
+        """Test statements run again with other parameters are counted."""
+        collected = metrics.RequestMetrics()
+        with connection.execute_wrapper(collected):
+            for i in range(3):
+                list(Post.objects.filter(id=i))
+            list(User.objects.all())
+        self.assertEqual(collected.queries, 4)
+        self.assertEqual(collected.duplicates, 2)
+
+    def test_admin_page(self):
+        """Test the percentiles per URL name are shown to staff only."""
+        self.authorized_client.get(reverse('index'))
+        self.assertIn('index', metrics.summary())
+        url = reverse('request_metrics')
+        self.assertRedirects(
+            self.authorized_client.get(url),
+            f"{reverse('admin:login')}?next={url}")
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        response = admin_client.get(url)
+        self.assertContains(response, '<td>index</td>')
+        counts = {name: count for name, count, _ in response.context['rows']}
+        self.assertEqual(counts['index'], 1)
@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowModelTests(TestCase):
+    def test_follow_is_unique(self):
+        """Test the database rejects a second identical follow."""
+        user = User.objects.create_user(username='StasBasov')
+        author = User.objects.create_user(username='Denis')
+        Follow.objects.create(user=user, author=author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=user, author=author)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.cats = Group.objects.create(
+            title='TheCats', slug='Cat', description='We like cats')
+        cls.dogs = Group.objects.create(
+            title='TheDogs', slug='Dog', description='We like dogs')
+        cls.guest_client = Client()
+        cls.cats_url = reverse('group', args=[cls.cats.slug])
+        cls.dogs_url = reverse('group', args=[cls.dogs.slug])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_hit_costs_no_queries(self):
+        """Test a cached page is served without database queries."""
+        first = self.guest_client.get(reverse('index'))
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(reverse('index'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_conditional_requests(self):
+        """Test matching ETag and Last-Modified get 304."""
+        response = self.guest_client.get(self.cats_url)
+        not_modified = self.guest_client.get(
+            self.cats_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.guest_client.get(
+            self.cats_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_pages_vary_by_page_number(self):
+        """Test every page number is cached separately."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user) for i in range(11))
+        cache.clear()
+        first = self.guest_client.get(reverse('index'))
+        second = self.guest_client.get(reverse('index'), {'page': 2})
+        self.assertNotEqual(first.content, second.content)
+
+    def test_post_events_invalidate_feeds(self):
+        """Test create, edit, comment and delete refresh the right feeds."""
+        self.guest_client.get(self.dogs_url)
+        post = Post.objects.create(
+            text='Новый кот', author=self.user, group=self.cats)
+        self.assertContains(self.guest_client.get(self.cats_url), post.text)
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            post.text)
+        dogs_etag = self.guest_client.get(self.dogs_url)['ETag']
+
+        post.group = self.dogs
+        post.save()
+        self.assertContains(self.guest_client.get(self.dogs_url), post.text)
+        self.assertNotContains(self.guest_client.get(self.cats_url),
+                               post.text)
+        self.assertNotEqual(
+            self.guest_client.get(self.dogs_url)['ETag'], dogs_etag)
+
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('add_comment', args=[self.user, post.id]),
+                    {'text': 'Ок'})
+        self.assertContains(self.guest_client.get(self.dogs_url),
+                            'Комментариев')
+        post.delete()
+        self.assertNotContains(self.guest_client.get(self.dogs_url),
+                               post.text)
+
+    def test_authorized_users_bypass_cache(self):
+        """Test logged in users always get a fresh page."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('index'))
+        self.assertNotIn('ETag', response)
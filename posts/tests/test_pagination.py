@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post
+from posts.pagination import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user) for i in range(25))
+        cls.paginator = CursorPaginator(Post.objects.all(), 10)
+
+    def test_walk_forward_and_back(self):
+        """Test pages follow each other without gaps and duplicates."""
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(after=first.next_cursor)
+        third = self.paginator.get_page(after=second.next_cursor)
+        seen = [post.id for page in (first, second, third) for post in page]
+        expected = list(Post.objects.order_by('-pub_date', '-id')
+                        .values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        back = self.paginator.get_page(before=third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+
+    def test_broken_cursor(self):
+        """Test broken token falls back to the first page."""
+        page = self.paginator.get_page(after='not-a-cursor')
+        self.assertEqual(list(page), list(self.paginator.get_page()))
+
+    def test_no_count_query(self):
+        """Test a page costs exactly one query."""
+        first = self.paginator.get_page()
+        with self.assertNumQueries(1):
+            len(self.paginator.get_page(after=first.next_cursor))
+
+    @override_settings(CURSOR_PAGINATION_VIEWS=['index'])
+    def test_index_opt_in(self):
+        """Test index renders cursor links when it is opted in."""
+        response = Client().get(reverse('index'))
+        self.assertIsInstance(response.context['paginator'], CursorPaginator)
+        self.assertContains(response, '?after=')
+        self.assertNotContains(response, '?page=')
+
+    def test_follow_index_walks_with_cursors(self):
+        """Test the follow feed links deeper pages by cursor, not OFFSET."""
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        client = Client()
+        client.force_login(reader)
+        first = client.get(reverse('follow_index'))
+        self.assertNotContains(first, '?page=')
+        cursor = first.context['cursor_page'].next_cursor
+        with CaptureQueriesContext(connection) as context:
+            second = client.get(reverse('follow_index'), {'after': cursor})
+        self.assertIsInstance(second.context['paginator'], CursorPaginator)
+        self.assertEqual(
+            [post.id for post in first.context['page']] +
+            [post.id for post in second.context['page']],
+            list(Post.objects.order_by('-pub_date', '-id')
+                 .values_list('id', flat=True)[:20]))
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
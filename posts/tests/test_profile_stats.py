@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import profile_stats
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class ProfileStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PROFILE_FOLLOW_PREVIEW=3)
+    def test_counts_and_previews_in_one_query(self):
+        """Test counters and newest follow usernames come from one query."""
+        followers = [User.objects.create_user(username=f'reader{i}')
+                     for i in range(5)]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=self.author)
+        Follow.objects.create(user=self.author, author=self.user)
+        profile_stats.get(self.author)
+        profile_stats.namespace(self.author.pk).invalidate()
+        with CaptureQueriesContext(connection) as queries:
+            stats = profile_stats.get(self.author)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(stats['followers_count'], 5)
+        self.assertEqual(stats['following_count'], 1)
+        self.assertEqual(stats['followers'],
+                         ['reader4', 'reader3', 'reader2'])
+        self.assertEqual(stats['following'], ['StasBasov'])
+
+    def test_invalidated_on_follow_and_post(self):
+        """Test following and posting refresh the cached statistics."""
+        url = reverse('profile', args=[self.author.username])
+        self.authorized_client.get(url)
+        self.authorized_client.get(
+            reverse('profile_follow', args=[self.author.username]))
+        Post.objects.create(text='Пост', author=self.author)
+        response = self.authorized_client.get(url)
+        stats = response.context['stats']
+        self.assertEqual(stats['followers'], [self.user.username])
+        self.assertEqual(stats['posts_count'], 1)
+        self.assertContains(response, 'Подписчиков: 1')
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'posts_follow' in query['sql']
+                          and 'UNION ALL' in query['sql']])
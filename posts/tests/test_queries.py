@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+        cls.group = Group.objects.create(
+            title='TheCats', slug='Cat', description='We like cats')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f'Пост {i}', author=self.author, group=self.group)
+            self.authorized_client.post(
+                reverse('add_comment', args=[self.author, post.id]),
+                {'text': 'Ок'})
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def warm_query_counts(self, urls):
+        # New posts invalidate cached author statistics, fill them first.
+        for url in urls:
+            self.authorized_client.get(url)
+        return [self.count_queries(url) for url in urls]
+
+    def test_feed_query_count_does_not_grow(self):
+        """Test feed pages cost the same queries for 1 and 10 posts."""
+        urls = (reverse('index'),
+                reverse('group', args=[self.group.slug]),
+                reverse('profile', args=[self.author.username]),
+                reverse('follow_index'),
+                reverse('find_post') + '?text=Пост')
+        self.add_posts(1)
+        small = self.warm_query_counts(urls)
+        self.add_posts(9)
+        large = self.warm_query_counts(urls)
+        self.assertEqual(small, large)
+
+    def test_comment_count_rendered(self):
+        """Test precomputed comment count is shown in the feed."""
+        self.add_posts(1)
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'Комментариев: 1')
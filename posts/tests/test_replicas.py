@@ -0,0 +1,133 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from posts import counters, profile_stats, replicas, sidebar
+from posts.models import Follow, Group, Post, User
+
+
+@replicas.replica_reads
+def routed_view(request):
+    """Report where reads go before and after a write."""
+    routes = [router.db_for_read(Post), router.db_for_read(Session),
+              router.db_for_read(User)]
+    router.db_for_write(Post)
+    routes.append(router.db_for_read(Post))
+    return HttpResponse(' '.join(routes))
+
+
+@mock.patch('posts.replicas.replica_alias', return_value='replica')
+class ReplicaRouterTests(TestCase):
+    def test_reads_use_replica_until_write(self, alias):
+        """Test post reads go to the replica until the view writes."""
+        response = routed_view(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'replica default default default')
+
+    def test_recent_writer_reads_default(self, alias):
+        """Test the sticky cookie and POSTs keep reads on default."""
+        request = RequestFactory().get('/')
+        request.COOKIES[replicas.STICKY_COOKIE] = '1'
+        response = routed_view(request)
+        self.assertEqual(response.content,
+                         b'default default default default')
+        response = routed_view(RequestFactory().post('/'))
+        self.assertEqual(response.content,
+                         b'default default default default')
+
+
+# The test database stands in for the replica.
+@override_settings(REPLICA_DATABASE='default')
+class StickyCookieTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.post = Post.objects.create(text='Текст', author=cls.user)
+        counters.get_stats(cls.user)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def test_cookie_after_write(self):
+        """Test only requests that write set the sticky cookie."""
+        response = self.authorized_client.get(
+            reverse('profile', args=[self.user.username]))
+        self.assertNotIn(replicas.STICKY_COOKIE, response.cookies)
+        response = self.authorized_client.post(
+            reverse('add_comment', args=[self.user.username, self.post.id]),
+            {'text': 'Комментарий'})
+        cookie = response.cookies[replicas.STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+
+    @override_settings(REPLICA_DATABASE='missing')
+    def test_no_cookie_without_replica(self):
+        """Test writes set no cookie when there is no replica."""
+        response = self.authorized_client.post(
+            reverse('add_comment', args=[self.user.username, self.post.id]),
+            {'text': 'Комментарий'})
+        self.assertNotIn(replicas.STICKY_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_DATABASE='missing')
+    def test_sync_replica_needs_replica(self):
+        """Test sync_replica fails when no replica is configured."""
+        with self.assertRaises(CommandError):
+            call_command('sync_replica')
+
+
+@override_settings(REPLICA_DATABASE='stale')
+class StaleReplicaTests(TestCase):
+    databases = {'default', 'stale'}
+
+    @classmethod
+    def setUpClass(cls):
+        # A replica synced before any test data: every row is missing there.
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases['stale'] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(cls.directory.name, 'replica.sqlite3'))
+        with override_settings(REPLICA_DATABASE='stale'):
+            call_command('sync_replica', stdout=io.StringIO())
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['stale'].close()
+        del connections.databases['stale']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_cache_is_filled_from_default(self):
+        """Test an anonymous feed is not cached from a stale replica."""
+        Post.objects.create(text='Свежий пост', author=self.author)
+        for _ in range(2):
+            response = Client().get(reverse('index'))
+            self.assertContains(response, 'Свежий пост')
+
+    def test_stats_are_filled_from_default(self):
+        """Test profile counters are not cached from a stale replica."""
+        Follow.objects.create(user=self.user, author=self.author)
+        with replicas.reading():
+            stats = profile_stats.get(self.author)
+        self.assertEqual(stats['followers_count'], 1)
+        self.assertEqual(stats['followers'], [self.user.username])
+
+    def test_sidebar_is_filled_from_default(self):
+        """Test the group fragment is not rendered from a stale replica."""
+        group = Group.objects.create(
+            title='TheCats', slug='Cat', description='We like cats')
+        with replicas.reading():
+            self.assertEqual(list(sidebar.context()['groups']), [group])
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.cats = Post.objects.create(
+            text='Коты любят рыбу. Кошки любят котов.', author=cls.user)
+        cls.dogs = Post.objects.create(
+            text='Собаки любят кости, a кот любит рыбу', author=cls.user)
+        cls.english = Post.objects.create(
+            text='Running dogs played outside', author=cls.user)
+
+    def test_word_forms_and_ranking(self):
+        """Test different word forms match and the best post is first."""
+        self.assertEqual(list(search.search('котами')),
+                         [self.cats, self.dogs])
+        self.assertEqual(list(search.search('dog running')),
+                         [self.english])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Test the index is kept in sync with post saves and deletes."""
+        post = Post.objects.create(text='Hungry hamsters', author=self.user)
+        post.text = 'Голодный хомяк'
+        post.save()
+        self.assertFalse(search.search('hamster'))
+        self.assertIn(post, search.search('хомяки'))
+        post_id = post.id
+        post.delete()
+        self.assertFalse(SearchTerm.objects.filter(post_id=post_id))
+
+    def test_find_post_view(self):
+        """Test search page without a query and with one."""
+        client = Client()
+        self.assertEqual(client.get(reverse('find_post')).status_code, 200)
+        response = client.get(reverse('find_post'), {'text': 'рыба'})
+        self.assertCountEqual(response.context['page'],
+                              [self.cats, self.dogs])
+
+    def test_rebuild_command(self):
+        """Test the rebuild command restores a wiped index."""
+        SearchTerm.objects.all().delete()
+        call_command('rebuild_search_index', chunk_size=2, stdout=StringIO())
+        self.assertIn(self.dogs, search.search('кости'))
+
+    @override_settings(CURSOR_PAGINATION_VIEWS=['find_post'])
+    def test_find_post_cursor(self):
+        """Test search results can be paged by relevance cursors."""
+        Post.objects.bulk_create(
+            Post(text='рыба', author=self.user) for _ in range(10))
+        for post in Post.objects.filter(text='рыба'):
+            search.index_post(post)
+        first = Client().get(reverse('find_post'), {'text': 'рыба'})
+        page = first.context['page']
+        second = Client().get(reverse('find_post'),
+                              {'text': 'рыба', 'after': page.next_cursor})
+        seen = list(page) + list(second.context['page'])
+        self.assertEqual(len(set(seen)), 12)
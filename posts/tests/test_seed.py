@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from posts import timeline
+from posts.models import (Comment, Conversation, Follow, Group, Message, Post,
+                          TimelineEntry, TrendingPost, UserStats)
+
+User = get_user_model()
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, **options):
+        call_command('seed', users=50, posts=500, comments=100, follows=200,
+                     messages=100, groups=3, workers=1, chunk_size=64,
+                     stdout=StringIO(), **options)
+
+    def test_seed(self):
+        """Test the command creates every kind of rows and their counters."""
+        self.seed()
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 500)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertEqual(Follow.objects.count(), 200)
+        self.assertEqual(Message.objects.count(), 100)
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        self.assertFalse(
+            Message.objects.filter(user_from=F('user_to')).exists())
+        self.assertEqual(UserStats.objects.count(), 50)
+        dates = Post.objects.dates('pub_date', 'month')
+        self.assertGreater(len(dates), 1)
+
+    def test_derived_tables(self):
+        """Test conversations, timelines and trending posts are filled."""
+        self.seed(days=2)
+        pairs = set(Message.objects.values_list('user_from', 'user_to'))
+        self.assertEqual(Conversation.objects.count(), len(
+            pairs | {(to, sender) for sender, to in pairs}))
+        for user in Follow.objects.values_list('user', flat=True)[:5]:
+            newest = (Post.objects.filter(author__following__user=user)
+                      .order_by('-pub_date', '-id')
+                      [:timeline.timeline_length()])
+            self.assertEqual(
+                set(TimelineEntry.objects.filter(user=user)
+                    .values_list('post', flat=True)),
+                set(newest.values_list('id', flat=True)))
+        self.assertTrue(TrendingPost.objects.exists())
+
+    def test_power_law(self):
+        """Test a few authors write most of the posts."""
+        self.seed(posts_alpha=1.5)
+        per_author = sorted(Post.objects.order_by().values('author').annotate(
+            count=Count('id')).values_list('count', flat=True), reverse=True)
+        self.assertGreater(sum(per_author[:5]), 250)
+
+    def test_deterministic(self):
+        """Test the same seed gives the same rows."""
+        self.seed()
+        first = list(Post.objects.order_by('id').values_list(
+            'author__username', 'text'))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed()
+        self.assertEqual(list(Post.objects.order_by('id').values_list(
+            'author__username', 'text')), first)
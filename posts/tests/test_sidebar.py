@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group
+
+User = get_user_model()
+
+
+class SidebarTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='TheCats', slug='Cat', description='We like cats')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def sidebar_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(reverse('index'))
+        tables = ('"posts_group"', '"auth_user"')
+        return response, [query['sql'] for query in context
+                          if query['sql'].split(' FROM ')[-1]
+                          .startswith(tables)]
+
+    def test_warm_fragment_skips_queries(self):
+        """Test warm sidebars do not query groups and users."""
+        _, cold = self.sidebar_queries()
+        self.assertEqual(len(cold), 2)
+        _, warm = self.sidebar_queries()
+        self.assertEqual(warm, [])
+
+    def test_new_group_and_user_invalidate(self):
+        """Test creating a group or a user refreshes the sidebar."""
+        self.sidebar_queries()
+        Group.objects.create(title='TheDogs', slug='Dog', description='')
+        User.objects.create_user(username='Denis')
+        response, _ = self.sidebar_queries()
+        self.assertContains(response, 'Dog')
+        self.assertContains(response, 'Denis')
+
+    @override_settings(SIDEBAR_SIZE=1)
+    def test_sidebar_is_bounded(self):
+        """Test the sidebar renders at most SIDEBAR_SIZE groups."""
+        Group.objects.create(title='TheDogs', slug='Dog', description='')
+        response, _ = self.sidebar_queries()
+        self.assertContains(response, 'Cat')
+        self.assertNotContains(response, 'Dog</a>')
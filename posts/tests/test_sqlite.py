@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from blog.sqlite import base
+
+
+class SQLiteBackendTests(TestCase):
+    def pragma(self, cursor, name):
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        """Test new connections run the configured pragmas."""
+        with connection.cursor() as cursor:
+            self.assertEqual(self.pragma(cursor, 'busy_timeout'), 20000)
+            self.assertEqual(self.pragma(cursor, 'cache_size'), -64000)
+            self.assertEqual(self.pragma(cursor, 'synchronous'), 1)
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': None,
+                                       'busy_timeout': 1000})
+    def test_file_database(self):
+        """Test a database file is opened in WAL mode with the settings."""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = base.DatabaseWrapper({
+                **connection.settings_dict,
+                'NAME': os.path.join(directory, 'test.sqlite3')})
+            try:
+                with wrapper.cursor() as cursor:
+                    self.assertEqual(
+                        self.pragma(cursor, 'journal_mode'), 'wal')
+                    self.assertEqual(self.pragma(cursor, 'busy_timeout'), 1000)
+                    self.assertEqual(self.pragma(cursor, 'cache_size'), -2000)
+            finally:
+                wrapper.close()
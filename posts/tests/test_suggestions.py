@@ -0,0 +1,70 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import suggestions
+from posts.models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+@override_settings(FOLLOW_SUGGESTIONS=3)
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ['StasBasov', 'friend', 'fof', 'twin', 'star', 'loner']
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in names}
+        for user, author in [('StasBasov', 'friend'), ('friend', 'fof'),
+                             ('twin', 'friend'), ('fof', 'star'),
+                             ('friend', 'star'), ('twin', 'star')]:
+            Follow.objects.create(user=cls.users[user],
+                                  author=cls.users[author])
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.users['StasBasov'])
+
+    def suggested(self, name):
+        return [item.suggested.username
+                for item in suggestions.for_user(self.users[name])]
+
+    def test_graph_rows(self):
+        """Test the sparse rows list follows and followers of each user."""
+        graph = suggestions.load_graph()
+        number = {user_id: n for n, user_id in enumerate(graph.ids)}
+        star = number[self.users['star'].pk]
+        followers = {graph.ids[n] for n in graph.neighbours(
+            graph.followers, star)}
+        self.assertEqual(followers, {self.users[name].pk
+                                     for name in ('fof', 'friend', 'twin')})
+        self.assertEqual(graph.degree(graph.following, star), 0)
+
+    def test_compute(self):
+        """Test friends of friends and co-followers are suggested first."""
+        call_command('suggest_follows', stdout=io.StringIO())
+        self.assertEqual(self.suggested('StasBasov'), ['fof', 'twin', 'star'])
+        # Users who follow nobody get the most followed authors.
+        self.assertEqual(self.suggested('loner'), ['star', 'friend', 'fof'])
+        ranks = FollowSuggestion.objects.filter(
+            user=self.users['StasBasov']).values_list('rank', flat=True)
+        self.assertEqual(sorted(ranks), [0, 1, 2])
+
+    def test_sidebar(self):
+        """Test the sidebar reads suggestions not yet followed at once."""
+        suggestions.compute()
+        Follow.objects.create(user=self.users['StasBasov'],
+                              author=self.users['fof'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, '[Кого читать]')
+        self.assertEqual(
+            [item.suggested.username
+             for item in response.context['suggestions']], ['twin', 'star'])
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if 'posts_followsuggestion' in query['sql']]),
+                         1)
@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Group, Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def image():
+    return SimpleUploadedFile('small.gif', SMALL_GIF, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+
+    def test_generate_stores_url(self):
+        """Test the stored thumbnail URL is rendered instead of sorl."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image())
+        url = thumbnails.generate(post.id)
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_url, url)
+        self.assertTrue(url.startswith('/media/posts/renditions/'))
+        response = self.client.get(
+            reverse('post', args=[self.user.username, post.id]))
+        self.assertContains(response, f'<img class="card-img" src="{url}"')
+        self.assertContains(response, post.srcset_webp)
+
+    @override_settings(IMAGE_RENDITION_WIDTHS=(640, 320))
+    def test_renditions(self):
+        """Test every width is rendered in both formats under a hash name."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image())
+        thumbnails.generate(post.id)
+        post.refresh_from_db()
+        for srcset, extension in ((post.srcset_jpeg, 'jpg'),
+                                  (post.srcset_webp, 'webp')):
+            renditions = [item.split() for item in srcset.split(', ')]
+            self.assertEqual([width for _, width in renditions],
+                             ['320w', '640w'])
+            for url, _ in renditions:
+                self.assertRegex(url, r'/[0-9a-f]{32}\.%s$' % extension)
+        self.assertIn(post.thumbnail_url, post.srcset_jpeg.split(', ')[-1])
+
+    def test_generate_refreshes_cached_feeds(self):
+        """Test cached feed pages and API payloads show the thumbnail."""
+        cache.clear()
+        group = Group.objects.create(title='TheCats', slug='Cat')
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=group, image=image())
+        urls = [reverse('index'), reverse('group', args=[group.slug]),
+                reverse('api_index'), reverse('api_group', args=[group.slug])]
+        for url in urls:
+            self.client.get(url)
+        thumbnail = thumbnails.generate(post.id)
+        for url in urls:
+            self.assertContains(self.client.get(url), thumbnail)
+
+    def test_post_without_image(self):
+        """Test posts without an image get no thumbnail."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        self.assertEqual(thumbnails.generate(post.id), '')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GenerateThumbnailsCommandTests(TransactionTestCase):
+    def test_backfill(self):
+        """Test the command fills missing thumbnails of existing posts."""
+        user = User.objects.create_user(username='StasBasov')
+        with_image = [Post.objects.create(text=f'Пост {i}', author=user,
+                                          image=image()) for i in range(3)]
+        Post.objects.create(text='Без картинки', author=user)
+        # Threads share the in-memory test database, which never waits
+        # on locks, so a single worker keeps the test deterministic.
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(
+            id__in=[post.id for post in with_image], thumbnail_url=''))
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='Denis')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def follow(self):
+        self.authorized_client.get(
+            reverse('profile_follow', args=[self.author]))
+
+    def test_push_backfill_purge(self):
+        """Test timeline follows new posts, follows and unfollows."""
+        old = Post.objects.create(text='Старый пост', author=self.author)
+        self.follow()
+        new = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            list(timeline.home_posts(self.user).order_by('-pub_date')),
+            [new, old])
+        response = self.authorized_client.get(reverse('follow_index'))
+        self.assertContains(response, new.text)
+        self.authorized_client.get(
+            reverse('profile_unfollow', args=[self.author]))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+
+    @override_settings(TIMELINE_LENGTH=3)
+    def test_timeline_is_bounded(self):
+        """Test only the newest TIMELINE_LENGTH posts are kept."""
+        self.follow()
+        posts = [Post.objects.create(text=f'Пост {i}', author=self.author)
+                 for i in range(5)]
+        kept = TimelineEntry.objects.filter(user=self.user)
+        self.assertEqual(sorted(kept.values_list('post', flat=True)),
+                         [post.id for post in posts[2:]])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulled_author(self):
+        """Test posts of popular authors are read instead of pushed."""
+        Follow.objects.create(user=self.user, author=self.author)
+        UserStats.objects.create(user=self.author, followers_count=1)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        self.assertIn(post, timeline.home_posts(self.user))
@@ -0,0 +1,106 @@
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Group, Post, TrendingCounter, TrendingPost
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE_HOURS=1, TRENDING_WINDOW_HOURS=10)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.group = Group.objects.create(
+            title='TheCats', slug='Cat', description='We like cats')
+        cls.other_group = Group.objects.create(
+            title='TheDogs', slug='Dog', description='We like dogs')
+        cls.old = Post.objects.create(
+            text='Old news', author=cls.user, group=cls.group)
+        cls.fresh = Post.objects.create(
+            text='Fresh news', author=cls.user, group=cls.other_group)
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def weights(self, kind):
+        return dict(TrendingCounter.objects.filter(kind=kind).values_list(
+            'object_id', 'weight'))
+
+    def test_events_add_up_in_one_bucket(self):
+        """Test events of a bucket add their weights to the same rows."""
+        trending.record('comment', [(self.old.pk, self.group.pk)])
+        trending.record('comment', [(self.old.pk, self.group.pk),
+                                    (self.fresh.pk, None)])
+        self.assertEqual(self.weights('post'),
+                         {self.old.pk: 2.0, self.fresh.pk: 1.0})
+        self.assertEqual(self.weights('group'), {self.group.pk: 2.0})
+
+    def test_views_record_activity(self):
+        """Test new posts and comments are counted."""
+        self.authorized_client.post(reverse('new_post'), {'text': 'Hello'})
+        post = Post.objects.get(text='Hello')
+        self.authorized_client.post(
+            reverse('add_comment', args=[self.user.username, post.pk]),
+            {'text': 'Nice'})
+        self.assertEqual(self.weights('post'), {
+            post.pk: trending.WEIGHTS['post'] + trending.WEIGHTS['comment']})
+
+    def test_batch_costs_constant_queries(self):
+        """Test recording many posts does not query once per post."""
+        posts = [(self.old.pk, self.group.pk), (self.fresh.pk, None)]
+        with CaptureQueriesContext(connection) as context:
+            trending.record('follow', posts[:1])
+        with CaptureQueriesContext(connection) as batch:
+            trending.record('follow', posts)
+        self.assertLessEqual(len(batch), len(context) + 1)
+
+    def test_compact_decays_and_expires(self):
+        """Test older activity counts less and expired buckets go away."""
+        now = timezone.now()
+        for post, hours, weight in [(self.old, 3, 5.0), (self.fresh, 0, 1.0),
+                                    (self.fresh, 11, 100.0)]:
+            TrendingCounter.objects.create(
+                kind='post', object_id=post.pk, weight=weight,
+                bucket=trending.bucket_of(
+                    now - datetime.timedelta(hours=hours)))
+        sizes = trending.compact(now)
+        self.assertEqual(sizes['post'], 2)
+        self.assertEqual(list(trending.hot_posts()), [self.fresh, self.old])
+        self.assertEqual(TrendingCounter.objects.count(), 2)
+
+    def test_compact_skips_deleted_posts(self):
+        """Test counters of deleted posts are not ranked."""
+        post = Post.objects.create(text='Gone', author=self.user)
+        trending.record('post', [(post.pk, None)])
+        post.delete()
+        trending.compact()
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_hot_index_and_sidebar(self):
+        """Test ?sort=hot and the sidebar follow the stored ranking."""
+        trending.record('comment', [(self.fresh.pk, self.other_group.pk)])
+        self.guest_client.get(reverse('index'))
+        call_command('compact_trending', stdout=io.StringIO())
+        response = self.guest_client.get(reverse('index'), {'sort': 'hot'})
+        self.assertTrue(response.context['hot'])
+        self.assertEqual(list(response.context['page']), [self.fresh])
+        self.assertEqual(list(response.context['groups']),
+                         [self.other_group, self.group])
+        content = response.content.decode()
+        self.assertLess(content.index(reverse('group', args=['Dog'])),
+                        content.index(reverse('group', args=['Cat'])))
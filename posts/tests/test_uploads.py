@@ -0,0 +1,66 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def publish(self, image):
+        return self.authorized_client.post(
+            reverse('new_post'), {'text': 'Пост', 'image': image})
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=1000)
+    def test_too_many_bytes(self):
+        """Test files over the byte limit are rejected."""
+        image = SimpleUploadedFile('image.png', b'\0' * 5000,
+                                   content_type='image/png')
+        response = self.publish(image)
+        self.assertFormError(response, 'form', 'image',
+                             'Файл больше 1000\xa0байт')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000)
+    def test_too_many_pixels(self):
+        """Test images over the pixel limit are rejected by the header."""
+        response = self.publish(png(100, 20))
+        self.assertEqual(len(response.context['form'].errors['image']), 1)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_SIDE=50)
+    def test_large_image_is_reencoded(self):
+        """Test accepted images are scaled down to IMAGE_MAX_SIDE."""
+        self.publish(png(200, 100))
+        post = Post.objects.get()
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (50, 25))
+            self.assertEqual(image.format, 'PNG')
@@ -0,0 +1,137 @@
+"""Thumbnails of post images generated off the request path.
+
+new_post and post_edit schedule the post after their transaction commits;
+a pool of THUMBNAIL_WORKERS threads decodes the image once and renders the
+960x339 crop at every width of IMAGE_RENDITION_WIDTHS, as JPEG and WebP.
+Files are named after a hash of their content, so they never change and
+can be served with a far-future expiry. The URL of the largest JPEG and
+the srcset of each format are stored on the post, which post_item.html
+prefers over the inline {% thumbnail %} tag. The generate_thumbnails
+command fills them for existing posts. The update sends no signal, so
+the cached feeds showing the post are dropped here.
+"""
+import functools
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from . import page_cache
+from .models import Post
+
+WIDTH, HEIGHT = 960, 339
+# Pillow format, extension and save options of every rendition.
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True,
+                             'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+DIRECTORY = 'posts/renditions'
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def workers() -> int:
+    return getattr(settings, 'THUMBNAIL_WORKERS', 2)
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers(), thread_name_prefix='thumbnails')
+        return _executor
+
+
+def widths() -> list:
+    return sorted(getattr(settings, 'IMAGE_RENDITION_WIDTHS',
+                          (320, 640, 960)))
+
+
+def formats() -> list:
+    return [name for name in FORMATS
+            if name != 'webp' or features.check('webp')]
+
+
+def _save(image, name) -> str:
+    format, extension, options = FORMATS[name]
+    buffer = io.BytesIO()
+    image.save(buffer, format, **options)
+    content = buffer.getvalue()
+    path = '%s/%s.%s' % (DIRECTORY, hashlib.sha256(
+        content).hexdigest()[:32], extension)
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(content))
+    return default_storage.url(path)
+
+
+def render(file) -> dict:
+    """Render every rendition of an image file from a single decode.
+
+    Return {format: [(width, url), ...]} with the widths in ascending order.
+    """
+    sizes = [(width, round(width * HEIGHT / WIDTH)) for width in widths()]
+    with Image.open(file) as image:
+        # JPEGs are decoded straight at the smallest sufficient scale.
+        image.draft('RGB', sizes[-1])
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    largest = ImageOps.fit(image, sizes[-1], Image.LANCZOS)
+    images = [largest.resize(size, Image.LANCZOS) for size in sizes[:-1]]
+    images.append(largest)
+    return {name: [(size[0], _save(image, name))
+                   for size, image in zip(sizes, images)]
+            for name in formats()}
+
+
+def srcset(renditions) -> str:
+    return ', '.join('%s %sw' % (url, width) for width, url in renditions)
+
+
+def generate(post_id: int) -> str:
+    """Render the renditions of a post image and store their URLs."""
+    post = (Post.objects.select_related('group').only('image', 'group__slug')
+            .filter(pk=post_id).first())
+    if post is None or not post.image:
+        return ''
+    with post.image.open('rb') as file:
+        renditions = render(file)
+    url = renditions['jpeg'][-1][1]
+    # The image may have been replaced while the renditions were rendered.
+    if Post.objects.filter(pk=post_id, image=post.image.name).update(
+            thumbnail_url=url,
+            srcset_jpeg=srcset(renditions['jpeg']),
+            srcset_webp=srcset(renditions.get('webp', []))):
+        # Pages and API payloads of the index and the group feed.
+        page_cache.invalidate([post.group.slug if post.group_id else None])
+    return url
+
+
+def run(post_id: int) -> bool:
+    """Generate a thumbnail in a worker thread, return False on failure."""
+    close_old_connections()
+    try:
+        generate(post_id)
+        return True
+    except Exception:
+        logger.exception('Thumbnail of post %s failed', post_id)
+        return False
+    finally:
+        close_old_connections()
+
+
+def schedule(post):
+    """Queue the thumbnail of a saved post once the transaction commits."""
+    if post.image:
+        transaction.on_commit(
+            functools.partial(executor().submit, run, post.pk))
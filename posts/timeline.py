@@ -0,0 +1,150 @@
+"""Fan-out-on-write home timelines for follow_index.
+
+Every new post is copied into the TimelineEntry rows of the author's
+followers, and each timeline keeps only its TIMELINE_LENGTH newest
+entries. Authors with more than TIMELINE_FANOUT_LIMIT followers are not
+fanned out; their posts are pulled at read time instead.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+BATCH_SIZE = 500
+
+
+def timeline_length() -> int:
+    return getattr(settings, 'TIMELINE_LENGTH', 500)
+
+
+def fanout_limit() -> int:
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 10000)
+
+
+def is_pulled(author) -> bool:
+    """Return True if posts of the author are read on demand.
+
+    Only stored counters are consulted, the same way home_posts() does,
+    so an author is either pushed or pulled but never both or neither.
+
+    """
+    return UserStats.objects.filter(
+        user=author, followers_count__gt=fanout_limit()).exists()
+
+
+def trim(user_ids):
+    """Drop timeline entries beyond the newest TIMELINE_LENGTH per user."""
+    user_ids = list(user_ids)
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE id IN ('
+                f'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+                f'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+                f') AS position FROM {table} '
+                f'WHERE user_id IN ({placeholders})) AS ranked '
+                f'WHERE position > %s)',
+                [*batch, timeline_length()])
+
+
+def push(post):
+    """Copy a new post into the timelines of the author's followers."""
+    if is_pulled(post.author_id):
+        return
+    followers = list(Follow.objects.filter(author=post.author_id)
+                     .values_list('user', flat=True))
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+    trim(followers)
+
+
+def rebuild(user_ids) -> int:
+    """Refill the timelines of the users from the authors they follow.
+
+    For follows and posts inserted without signals, e.g. by `manage.py
+    seed`. Return the number of entries written.
+
+    """
+    user_ids = list(user_ids)
+    quote = connection.ops.quote_name
+    table = quote(TimelineEntry._meta.db_table)
+    follow, post = quote(Follow._meta.db_table), quote(Post._meta.db_table)
+    stats = quote(UserStats._meta.db_table)
+    total = 0
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(batch))
+        with transaction.atomic():
+            TimelineEntry.objects.filter(user__in=batch).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} (user_id, post_id, pub_date) '
+                    f'SELECT user_id, post_id, pub_date FROM ('
+                    f'SELECT f.user_id, p.id AS post_id, p.pub_date, '
+                    f'ROW_NUMBER() OVER (PARTITION BY f.user_id '
+                    f'ORDER BY p.pub_date DESC, p.id DESC) AS position '
+                    f'FROM {follow} f JOIN {post} p '
+                    f'ON p.author_id = f.author_id '
+                    f'WHERE f.user_id IN ({placeholders}) '
+                    f'AND f.author_id NOT IN (SELECT user_id FROM {stats} '
+                    f'WHERE followers_count > %s)) AS ranked '
+                    f'WHERE position <= %s',
+                    [*batch, fanout_limit(), timeline_length()])
+                total += cursor.rowcount
+    return total
+
+
+def backfill(user, author):
+    """Load recent posts of a newly followed author into a timeline."""
+    if is_pulled(author):
+        return
+    recent = (Post.objects.filter(author=author)
+              .order_by('-pub_date', '-id')
+              .values_list('id', 'pub_date')[:timeline_length()])
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in recent),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+    trim([user.pk])
+
+
+def backfill_many(user, author_ids):
+    """backfill() for many newly followed authors at once."""
+    # Only the newest TIMELINE_LENGTH posts of all of them can stay.
+    pulled = UserStats.objects.filter(
+        user__in=author_ids,
+        followers_count__gt=fanout_limit()).values('user')
+    recent = (Post.objects.filter(author__in=author_ids)
+              .exclude(author__in=pulled)
+              .order_by('-pub_date', '-id')
+              .values_list('id', 'pub_date')[:timeline_length()])
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in recent),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+    trim([user.pk])
+
+
+def purge(user, author):
+    """Remove posts of an unfollowed author from a timeline."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def purge_many(user, author_ids):
+    TimelineEntry.objects.filter(
+        user=user, post__author__in=author_ids).delete()
+
+
+def home_posts(user):
+    """Posts of the user's timeline plus posts of pulled authors."""
+    pushed = TimelineEntry.objects.filter(user=user).values('post')
+    pulled = Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=fanout_limit()).values('author')
+    return Post.objects.filter(Q(pk__in=pushed) | Q(author__in=pulled))
@@ -0,0 +1,180 @@
+"""Trending posts and groups.
+
+New posts, comments and follows add their WEIGHTS to TrendingCounter rows,
+one per post or group and TRENDING_BUCKET_MINUTES of time. An event
+touching many posts, like a batch of follows, costs one UPDATE of the rows
+already in the current bucket and one INSERT of the others. `compact()`,
+run every few minutes by `manage.py compact_trending`, sums the buckets of
+the last TRENDING_WINDOW_HOURS with a weight halving every
+TRENDING_HALF_LIFE_HOURS, deletes the older buckets and stores the
+TRENDING_SIZE best posts and groups in TrendingPost and TrendingGroup. The
+sidebar and `?sort=hot` read these rankings only.
+"""
+import datetime
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FloatField, Max, Value, When
+from django.utils import timezone
+
+from . import sidebar
+from .models import (Comment, Group, Post, TrendingCounter, TrendingGroup,
+                     TrendingPost)
+
+BATCH_SIZE = 500
+WEIGHTS = {'post': 3.0, 'comment': 1.0, 'follow': 2.0}
+
+
+def bucket_minutes() -> int:
+    return getattr(settings, 'TRENDING_BUCKET_MINUTES', 60)
+
+
+def window() -> datetime.timedelta:
+    return datetime.timedelta(
+        hours=getattr(settings, 'TRENDING_WINDOW_HOURS', 72))
+
+
+def half_life() -> datetime.timedelta:
+    return datetime.timedelta(
+        hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 12))
+
+
+def ranking_size() -> int:
+    return getattr(settings, 'TRENDING_SIZE', 200)
+
+
+def bucket_of(moment) -> datetime.datetime:
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    minutes = moment.hour * 60 + moment.minute
+    return day + datetime.timedelta(
+        minutes=minutes - minutes % bucket_minutes())
+
+
+def _add(kind, weights, bucket):
+    """Add {object_id: weight} to the bucket, by one UPDATE and one INSERT."""
+    rows = TrendingCounter.objects.filter(kind=kind, bucket=bucket)
+    existing = set(rows.filter(object_id__in=weights)
+                   .values_list('object_id', flat=True))
+    if existing:
+        rows.filter(object_id__in=existing).update(weight=F('weight') + Case(
+            *(When(object_id=object_id, then=Value(weights[object_id]))
+              for object_id in existing), output_field=FloatField()))
+    missing = {object_id: weight for object_id, weight in weights.items()
+               if object_id not in existing}
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            TrendingCounter.objects.bulk_create(
+                TrendingCounter(kind=kind, object_id=object_id,
+                                bucket=bucket, weight=weight)
+                for object_id, weight in missing.items())
+    except IntegrityError:
+        # Created by a concurrent event in the meantime.
+        _add(kind, missing, bucket)
+
+
+def record(event, posts):
+    """Add the weight of an event to the (post id, group id) pairs."""
+    bucket = bucket_of(timezone.now())
+    weight = WEIGHTS[event]
+    weights = {'post': defaultdict(float), 'group': defaultdict(float)}
+    for post_id, group_id in posts:
+        weights['post'][post_id] += weight
+        if group_id:
+            weights['group'][group_id] += weight
+    for kind, batch in weights.items():
+        items = list(batch.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            _add(kind, dict(items[start:start + BATCH_SIZE]), bucket)
+
+
+def post_created(post):
+    record('post', [(post.pk, post.group_id)])
+
+
+def comment_added(comment):
+    record('comment', [(comment.post_id, comment.post.group_id)])
+
+
+def followed(author_ids):
+    """Credit a follow to the newest post of each author in the window."""
+    newest = (Post.objects.filter(
+        author__in=author_ids, pub_date__gte=timezone.now() - window())
+        .order_by().values('author').annotate(newest=Max('id'))
+        .values('newest'))
+    record('follow', Post.objects.filter(id__in=newest)
+           .values_list('id', 'group_id'))
+
+
+def rebuild(now=None) -> int:
+    """Recount the buckets of the window from posts and comments.
+
+    For rows inserted without the hooks, e.g. by `manage.py seed`. Follows
+    have no date and are not counted. Return the number of counters.
+
+    """
+    now = now or timezone.now()
+    since = now - window()
+    weights = defaultdict(float)
+    for event, rows in (
+            ('post', Post.objects.filter(
+                pub_date__range=(since, now))
+             .values_list('id', 'group_id', 'pub_date')),
+            ('comment', Comment.objects.filter(
+                created__range=(since, now))
+             .values_list('post_id', 'post__group_id', 'created'))):
+        for post_id, group_id, moment in rows.iterator(chunk_size=10000):
+            bucket = bucket_of(moment)
+            weights['post', post_id, bucket] += WEIGHTS[event]
+            if group_id:
+                weights['group', group_id, bucket] += WEIGHTS[event]
+    with transaction.atomic():
+        TrendingCounter.objects.all().delete()
+        TrendingCounter.objects.bulk_create(
+            (TrendingCounter(kind=kind, object_id=object_id, bucket=bucket,
+                             weight=weight)
+             for (kind, object_id, bucket), weight in weights.items()),
+            batch_size=BATCH_SIZE)
+    return len(weights)
+
+
+def compact(now=None) -> dict:
+    """Drop expired buckets and store the rankings, return their sizes."""
+    now = now or timezone.now()
+    TrendingCounter.objects.filter(bucket__lt=now - window()).delete()
+    seconds = half_life().total_seconds()
+    scores = {'post': defaultdict(float), 'group': defaultdict(float)}
+    rows = TrendingCounter.objects.values_list(
+        'kind', 'object_id', 'bucket', 'weight')
+    for kind, object_id, bucket, weight in rows.iterator(chunk_size=10000):
+        age = max((now - bucket).total_seconds(), 0)
+        scores[kind][object_id] += weight * 0.5 ** (age / seconds)
+    sizes = {}
+    for kind, model, ranked, field in (
+            ('post', Post, TrendingPost, 'post_id'),
+            ('group', Group, TrendingGroup, 'group_id')):
+        best = heapq.nlargest(ranking_size(), scores[kind].items(),
+                              key=lambda item: (item[1], item[0]))
+        # Counters outlive deleted posts and groups.
+        existing = set(model.objects.filter(
+            id__in=[object_id for object_id, _ in best])
+            .values_list('id', flat=True))
+        best = [item for item in best if item[0] in existing]
+        with transaction.atomic():
+            ranked.objects.all().delete()
+            ranked.objects.bulk_create(
+                (ranked(**{field: object_id}, rank=rank, score=score)
+                 for rank, (object_id, score) in enumerate(best)),
+                batch_size=BATCH_SIZE)
+        sizes[kind] = len(best)
+    sidebar.invalidate('groups')
+    return sizes
+
+
+def hot_posts():
+    """Trending posts, hottest first."""
+    return Post.objects.filter(
+        trending__isnull=False).order_by('trending__rank')
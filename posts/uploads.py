@@ -0,0 +1,126 @@
+"""Size-bounded streaming of uploaded images.
+
+ImageUploadHandler replaces Django's upload handlers (FILE_UPLOAD_HANDLERS)
+and streams every file to a temporary file on disk. While the first chunks
+arrive it reads the image header and rejects images with more than
+IMAGE_UPLOAD_MAX_PIXELS pixels before anything is decoded; files larger
+than IMAGE_UPLOAD_MAX_BYTES are dropped as soon as they cross the limit.
+A rejected file reaches the form as a RejectedUpload carrying the reason,
+see PostForm. Accepted images larger than IMAGE_MAX_SIDE are re-encoded
+down to it by `cap_size()`.
+"""
+import io
+import os
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile, UploadedFile)
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Largest prefix of a file read while looking for the image header.
+HEADER_LIMIT = 2 ** 20
+# Pillow formats kept on re-encoding, others are saved as PNG.
+KEPT_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def max_bytes() -> int:
+    return getattr(settings, 'IMAGE_UPLOAD_MAX_BYTES', 10 * 2 ** 20)
+
+
+def max_pixels() -> int:
+    return getattr(settings, 'IMAGE_UPLOAD_MAX_PIXELS', 40000000)
+
+
+def max_side() -> int:
+    return getattr(settings, 'IMAGE_MAX_SIDE', 2560)
+
+
+class RejectedUpload(UploadedFile):
+    """Empty stand-in of an uploaded file that broke the limits."""
+
+    def __init__(self, name, error):
+        super().__init__(io.BytesIO(), name, None, 0)
+        self.error = error
+
+
+def image_size(head: bytes):
+    """Return the (width, height) of an image header or None.
+
+    Image.DecompressionBombError is raised for sizes Pillow itself refuses.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+        try:
+            # Image.open() parses the header only, pixels stay undecoded.
+            with Image.open(io.BytesIO(head)) as image:
+                return image.size
+        except Image.DecompressionBombError:
+            raise
+        except Exception:
+            return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to disk and enforce the byte and pixel limits."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.head = bytearray()
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None
+        self.size += len(raw_data)
+        if self.size > max_bytes():
+            self.error = 'Файл больше %s' % filesizeformat(max_bytes())
+            return None
+        if self.head is not None:
+            self.head += raw_data
+            self.check_header()
+        return super().receive_data_chunk(raw_data, start)
+
+    def check_header(self):
+        try:
+            size = image_size(bytes(self.head))
+        except Image.DecompressionBombError:
+            size = (max_pixels() + 1, 1)
+        if size is None and len(self.head) < HEADER_LIMIT:
+            # The header may still be incomplete.
+            return
+        self.head = None
+        if size is not None and size[0] * size[1] > max_pixels():
+            self.error = 'Изображение больше %d мегапикселей' % (
+                max_pixels() // 10 ** 6)
+
+    def file_complete(self, file_size):
+        if not self.error:
+            return super().file_complete(file_size)
+        self.file.close()
+        return RejectedUpload(self.file_name, self.error)
+
+
+def cap_size(upload):
+    """Return the upload re-encoded to IMAGE_MAX_SIDE or unchanged."""
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if max(image.size) <= max_side():
+            upload.seek(0)
+            return upload
+        format = image.format if image.format in KEPT_FORMATS else 'PNG'
+        # The bounding box is square, so scaling before the EXIF rotation
+        # gives the same size and the copy it makes is already small.
+        image.thumbnail((max_side(), max_side()), Image.LANCZOS)
+        image = ImageOps.exif_transpose(image)
+        if format == 'JPEG':
+            image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format, quality=85)
+    name = '%s.%s' % (os.path.splitext(upload.name)[0], KEPT_FORMATS[format])
+    return InMemoryUploadedFile(
+        buffer, None, name, Image.MIME[format],
+        buffer.tell(), None)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.index, name="index"),
@@ -9,6 +9,18 @@ urlpatterns = [
         name='new_group',
     ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("api/posts/", api.index, name="api_index"),
+    path("api/posts/<int:post_id>/", api.post, name="api_post"),
+    path("api/posts/<int:post_id>/comments/", api.comments,
+         name="api_comments"),
+    path("api/groups/<slug:slug>/posts/", api.group_posts, name="api_group"),
+    path("api/users/<str:username>/", api.profile, name="api_profile"),
+    path("api/users/<str:username>/posts/", api.profile_posts,
+         name="api_profile_posts"),
+    path("api/follow/posts/", api.follow_index, name="api_follow_index"),
+    path("api/follow/", api.follow_many, name="api_follow"),
+    path("api/unfollow/", api.unfollow_many, name="api_unfollow"),
+    path("inbox/", views.inbox, name="inbox"),
     path('<str:username>/message/', views.message, name='message'),
     path("find_post/", views.find_post, name='find_post'),
     path("group/<slug:slug>/", views.group_posts, name='group'),
@@ -21,6 +33,10 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'),
     path(
         "<username>/<int:post_id>/comment",
         views.add_comment,
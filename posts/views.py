@@ -1,55 +1,95 @@
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models.query import QuerySet
 from django.http import request
 from django.shortcuts import render, get_object_or_404, redirect
+from . import (messaging, profile_stats, search, sidebar, thumbnails,
+               timeline, trending)
 from .forms import PostForm, CommentForm, GroupForm
-from .models import Post, Group, User, Follow, Message
-import operator
+from .models import Post, Group, User, Follow
+from .page_cache import cache_anonymous_feed
+from .pagination import CursorPage, CursorPaginator
+from .replicas import replica_reads
 
 
-def get_paginator(request, data: QuerySet):
+def get_paginator(request, data: QuerySet, cursor: bool = None,
+                  ordering=('-pub_date', '-id')):
     """Return a paginator.
 
+    Views listed in settings.CURSOR_PAGINATION_VIEWS get a keyset
+    paginator driven by the `after`/`before` tokens instead of `page`.
+
     Keyword arguments:
-    request -- HttpRequest's object
-    data    -- Data that we need to split on pages
+    request  -- HttpRequest's object
+    data     -- Data that we need to split on pages
+    cursor   -- Force (True) or forbid (False) cursor pagination
+    ordering -- Unique ordering of `data` the cursors are built from
 
     """
+    if cursor is None:
+        match = request.resolver_match
+        cursor = match is not None and match.url_name in getattr(
+            settings, 'CURSOR_PAGINATION_VIEWS', ())
+    if cursor:
+        paginator = CursorPaginator(data, 10, ordering)
+        page = paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+        return page, paginator
     paginator = Paginator(data, 10)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
     return page, paginator
 
 
+def get_comments(request, post):
+    """Return a cursor page of comments under the post and their order.
+
+    `?order=newest` lists the newest comments first, the default is the
+    oldest first. The next batch follows the `after` cursor.
+
+    """
+    order = 'newest' if request.GET.get('order') == 'newest' else 'oldest'
+    ordering = ('-created', '-id') if order == 'newest' else ('created', 'id')
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        getattr(settings, 'COMMENTS_PER_PAGE', 20), ordering)
+    return paginator.get_page(after=request.GET.get('after')), order
+
+
+@cache_anonymous_feed('index')
+@replica_reads
 def index(request):
-    """This view shows the general site's page."""
-    posts = Post.objects.all()
-    page, paginator = get_paginator(request, posts)
-    groups = Group.objects.all()
-    users = User.objects.all()
+    """This view shows the general site's page, `?sort=hot` by trend."""
+    hot = request.GET.get('sort') == 'hot'
+    if hot:
+        posts = trending.hot_posts().feed()
+        page, paginator = get_paginator(request, posts, cursor=False)
+    else:
+        page, paginator = get_paginator(request, Post.objects.feed())
     return render(
         request,
         'index.html',
         {'page': page,
          'paginator': paginator,
-         'groups': groups,
-         'users': users}
+         'hot': hot,
+         **sidebar.context(request.user)}
     )
 
 
+@cache_anonymous_feed('group')
+@replica_reads
 def group_posts(request, slug: str):
     """This view shows the group's posts."""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.feed()
     page, paginator = get_paginator(request, posts)
-    groups = Group.objects.all()
-    users = User.objects.all()
     return render(
         request,
         "group.html",
         {"page": page, 'paginator': paginator, "group": group,
-         'groups': groups, 'users': users}
+         **sidebar.context(request.user)}
     )
 
 
@@ -61,33 +101,53 @@ def new_post(request):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            with transaction.atomic():
+                post.save()
+                trending.post_created(post)
+                thumbnails.schedule(post)
             return redirect('index')
     return render(request, 'new.html', {'form': form})
 
 
+@replica_reads
 def profile(request, username: str):
     """This view shows the users's profil."""
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    posts = author.posts.feed()
     page, paginator = get_paginator(request, posts)
     is_follow = author.following.filter(user=request.user.id).exists()
     return render(
         request,
         'profile.html',
         {'page': page, 'paginator': paginator,
-         'author': author, 'following': is_follow}
+         'author': author, 'following': is_follow,
+         'stats': profile_stats.get(author)}
     )
 
 
+@replica_reads
 def post_view(request, username, post_id):
     """This view shows one post by post's id."""
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.feed(), id=post_id)
     form = CommentForm()
     is_follow = post.author.following.filter(user=request.user.id).exists()
+    page, order = get_comments(request, post)
     return render(request, 'post.html',
                   {'author': post.author, 'post': post, 'form': form,
-                   'comments': post.comments.all(), 'following': is_follow})
+                   'comments': page.paginator.object_list,
+                   'comment_page': page, 'order': order,
+                   'following': is_follow,
+                   'stats': profile_stats.get(post.author)})
+
+
+@replica_reads
+def post_comments(request, username, post_id):
+    """Return the HTML of the next batch of comments under a post."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    page, order = get_comments(request, post)
+    return render(request, 'comment_list.html',
+                  {'author': username, 'post': post, 'comment_page': page,
+                   'order': order})
 
 
 @login_required
@@ -101,7 +161,12 @@ def post_edit(request, username: str, post_id: int):
 
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            post = form.save(commit=False)
+            if 'image' in form.changed_data:
+                post.thumbnail_url = post.srcset_jpeg = post.srcset_webp = ''
+            post.save()
+            if 'image' in form.changed_data:
+                thumbnails.schedule(post)
             return redirect('post', username, post_id)
     return render(request, 'new.html', {"form": form,
                                         'post': post,
@@ -132,24 +197,37 @@ def add_comment(request, username, post_id):
             comment = form.save(commit=False)
             comment.post = Post.objects.get(id=post_id)
             comment.author = request.user
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                trending.comment_added(comment)
     return redirect('post', username, post_id)
 
 
 @login_required
+@replica_reads
 def follow_index(request):
-    """Show page with my lovely authors."""
-    posts = Post.objects.filter(author__following__user=request.user)
-    page, paginator = get_paginator(request, posts)
-    groups = Group.objects.all()
-    users = User.objects.all()
+    """Show page with my lovely authors.
+
+    The timeline is walked with cursors: the entry page keeps the numbered
+    Paginator, but its links carry `after`/`before` tokens, so deeper pages
+    never OFFSET over the timeline union.
+
+    """
+    posts = timeline.home_posts(request.user).feed()
+    cursor = 'after' in request.GET or 'before' in request.GET
+    page, paginator = get_paginator(request, posts, cursor=cursor or None)
+    if isinstance(page, CursorPage):
+        cursor_page = page
+    else:
+        cursor_page = CursorPage(list(page), CursorPaginator(posts, 10),
+                                 page.has_next(), page.has_previous())
     return render(
         request,
         'follow.html',
         {'page': page,
          'paginator': paginator,
-         'groups': groups,
-         'users': users}
+         'cursor_page': cursor_page,
+         **sidebar.context(request.user)}
     )
 
 
@@ -158,8 +236,11 @@ def profile_follow(request, username):
     """Create follow."""
     author = User.objects.get(username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user,
-                                     author=author)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(user=request.user,
+                                                      author=author)
+            if created:
+                trending.followed([author.pk])
     return redirect("follow_index")
 
 
@@ -175,47 +256,59 @@ def profile_unfollow(request, username):
 def post_delete(request, username, post_id):
     author = User.objects.get(username=username)
     if author == request.user:
-        author.posts.get(id=post_id).delete()
+        with transaction.atomic():
+            post = author.posts.get(id=post_id)
+            post.delete()
     return redirect('index')
 
 
+@replica_reads
 def find_post(request):
-    query = request.GET.get('text')
-    posts = Post.objects.filter(text__icontains=query)
-    page, paginator = get_paginator(request, posts)
-    groups = Group.objects.all()
-    users = User.objects.all()
+    """Show posts matching the query, most relevant first."""
+    query = request.GET.get('text', '').strip()
+    posts = search.search(query).feed()
+    page, paginator = get_paginator(request, posts,
+                                    ordering=('-score', '-id'))
     return render(
         request,
         'index.html',
         {'page': page, 'paginator': paginator, 'find': True, 'query': query,
-         'groups': groups, 'users': users}
+         **sidebar.context(request.user)}
     )
 
 
 @login_required
 def message(request, username):
+    """Show the newest page of the conversation with the user."""
     author = get_object_or_404(User, username=username)
-    messages_from = author.messages_to.filter(user_from=request.user)
-    messages_to = request.user.messages_to.filter(user_from=author)
-    messages = sorted(messages_to | messages_from,
-                      key=operator.attrgetter('created'))
+    page = messaging.conversation_page(request.user, author,
+                                       older=request.GET.get('after'))
+    conversations = list(messaging.inbox(request.user))
+    messaging.mark_read(request.user, author, conversations)
     is_follow = author.following.filter(user=request.user.id).exists()
     return render(request, 'message.html', {'author': author,
-                                            'messages': messages,
-                                            'following': is_follow})
+                                            'page': page,
+                                            'messages': page[::-1],
+                                            'conversations': conversations,
+                                            'following': is_follow,
+                                            'stats': profile_stats.get(
+                                                author)})
 
 
 @login_required
 def send_message(request, username):
     author = get_object_or_404(User, username=username)
-    Message.objects.create(
-        user_to=request.user,
-        user_from=author,
-        text=request.POST.get('message'))
+    messaging.send(request.user, author, request.POST.get('message'))
     return redirect('message', author.username)
 
 
+@login_required
+def inbox(request):
+    """Show the user's conversations, most recent first."""
+    return render(request, 'inbox.html',
+                  {'conversations': messaging.inbox(request.user)})
+
+
 def new_group(request):
     form = GroupForm(request.POST or None)
     if request.method == 'POST':